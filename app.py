@@ -1,18 +1,456 @@
+import contextvars
+import hashlib
+import io
+import itertools
+import logging
 import matplotlib as mpl
 import matplotlib.patheffects as path_effects
+import numpy as np
+import os
 import pandas as pd
+import psutil
+import queue
+import requests
 import streamlit as st
-import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from statsbombpy import sb
-from mplsoccer import VerticalPitch, Sbopen, FontManager, Pitch
+from mplsoccer import VerticalPitch, Pitch
 from matplotlib import pyplot as plt
+from matplotlib.font_manager import FontProperties
 import plotly.graph_objects as go
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+import cache_backends
+import data_source
+import export
+import instrumentation
+import warehouse
+
+data_source.install()
+
+
+EVENT_STORE_MAX_BYTES = int(os.environ.get('EVENT_STORE_MAX_MB', '512')) * 1024 ** 2
+MAX_CONCURRENT_LOADS = int(os.environ.get('MAX_CONCURRENT_LOADS', '8'))
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '2'))
+# Partidas mais distantes que isso da selecionada são descartadas sob pressão de memória
+PREFETCH_NEIGHBOURS = 2
+# Fração do EventStore e percentual da memória do sistema a partir dos quais a
+# pré-carga de baixa prioridade é cancelada
+PREFETCH_MAX_STORE_FILL = 0.8
+PREFETCH_MAX_SYSTEM_MEMORY = 90
+FIGURE_CACHE_MAX_BYTES = int(os.environ.get('FIGURE_CACHE_MAX_MB', '64')) * 1024 ** 2
+FIGURE_CACHE_DIR = os.environ.get('FIGURE_CACHE_DIR')
+# Limite do diretório de figuras; as usadas há mais tempo são apagadas primeiro
+FIGURE_CACHE_DIR_MAX_BYTES = int(os.environ.get('FIGURE_CACHE_DIR_MAX_MB', '256')) * 1024 ** 2
+# Segundos até uma figura gravada no cache compartilhado expirar
+FIGURE_SHARED_TTL = int(os.environ.get('FIGURE_SHARED_TTL', str(7 * 86400)))
+# Segundos até o catálogo gravado no cache compartilhado ser montado de novo
+CATALOGUE_TTL = int(os.environ.get('CATALOGUE_TTL', '86400'))
+# Resolução das figuras, limitada para que a largura não passe da área de conteúdo
+# do Streamlit (MAXIMUM_CONTENT_WIDTH); imagens mais largas são reduzidas e
+# recodificadas pelo st.image a cada execução
+FIGURE_DPI = 200
+FIGURE_MAX_WIDTH = 1460
+# Incrementar quando o visual das figuras mudar, para invalidar as figuras em cache
+STYLE_VERSION = 3
+
+TITLE_FONT_URL = 'https://raw.githubusercontent.com/google/fonts/main/apache/robotoslab/RobotoSlab%5Bwght%5D.ttf'
+TITLE_FONT_PATH = os.environ.get(
+    'TITLE_FONT_PATH', os.path.join(data_source.BASE_DIR, 'data', 'fonts', 'RobotoSlab.ttf'))
+
+_render_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class EventStore:
+    '''
+    Armazena em memória os dados já carregados de cada partida, compartilhados
+    entre todas as abas e sessões. Quando o uso de memória ultrapassa o limite,
+    os dados acessados há mais tempo são descartados (LRU). Também é usado para
+    guardar as figuras já renderizadas.
+
+    Args:
+        max_bytes (int): Limite de memória ocupada pelos dados armazenados
+        name (str): Prefixo dos contadores de acertos e falhas na instrumentação
+    '''
+
+    def __init__(self, max_bytes, name='event_store'):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key, loader):
+        '''
+        Retorna o valor armazenado para a chave, carregando-o uma única vez com
+        `loader` caso ainda não esteja em memória
+
+        Args:
+            key (tuple): Chave do dado, por exemplo ('match', match_id)
+            loader (callable): Função sem argumentos que carrega o dado
+
+        Returns:
+            O valor armazenado para a chave
+        '''
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                instrumentation.count(f'{self.name}_hit')
+                return self._entries[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Sessões que pedem a mesma partida ao mesmo tempo esperam uma única carga
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    instrumentation.count(f'{self.name}_hit')
+                    return self._entries[key]
+
+            instrumentation.count(f'{self.name}_miss')
+            value = loader()
+            size = _estimate_size(value)
+
+            with self._lock:
+                self._entries[key] = value
+                self._sizes[key] = size
+                self.total_bytes += size
+                self._loading.pop(key, None)
+                self._evict()
+
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(key)
+
+
+def _estimate_size(value) -> int:
+    '''
+    Estima a memória ocupada por um DataFrame, uma tupla de DataFrames ou bytes
+    '''
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(_estimate_size(item) for item in value)
+    if isinstance(value, warehouse.EventIndex):
+        return value.nbytes
+    return 0
+
+
+@st.cache_resource
+def get_event_store() -> EventStore:
+    '''
+    Cria o armazenamento de eventos compartilhado por todas as sessões do processo
+
+    Returns:
+        store (EventStore): Armazenamento de eventos das partidas
+    '''
+    return EventStore(EVENT_STORE_MAX_BYTES)
+
+
+@st.cache_resource
+def get_figure_cache() -> EventStore:
+    '''
+    Cria o cache de figuras renderizadas compartilhado por todas as sessões do processo
+
+    Returns:
+        cache (EventStore): Cache de imagens PNG das figuras
+    '''
+    return EventStore(FIGURE_CACHE_MAX_BYTES, name='figure_cache')
+
+
+@instrumentation.timed
+def render_figure(key: tuple, draw, rc=None, load=None) -> bytes:
+    '''
+    Retorna a figura renderizada em PNG, desenhando-a apenas se ela não estiver
+    no cache em memória nem no diretório FIGURE_CACHE_DIR
+
+    Args:
+        key (tuple): Entradas que definem a figura, ex.: ('pass_map', match_id, team, player)
+        draw (callable): Função que desenha e retorna a figura; recebe o resultado
+            de `load` quando ele é informado
+        rc (dict): rcParams do matplotlib válidos apenas durante o desenho
+        load (callable): Função sem argumentos que carrega os dados da figura. Roda
+            antes do desenho e fora da trava, para que uma leitura lenta não bloqueie
+            as figuras das outras sessões
+
+    Returns:
+        png (bytes): Imagem PNG da figura, com no máximo FIGURE_MAX_WIDTH pixels de largura
+    '''
+    key = key + (STYLE_VERSION,)
+    return get_figure_cache().get(key, lambda: _load_or_render(key, draw, rc, load))
+
+
+def _savefig(fig) -> bytes:
+    buffer = io.BytesIO()
+    dpi = min(FIGURE_DPI, FIGURE_MAX_WIDTH / fig.get_figwidth())
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    # O recorte justo pode deixar a imagem mais larga que a figura; a largura fica no cabeçalho IHDR
+    width = int.from_bytes(buffer.getvalue()[16:20], 'big')
+    if width > FIGURE_MAX_WIDTH:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi * (FIGURE_MAX_WIDTH - 1) / width,
+                    bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _load_or_render(key, draw, rc, load):
+    path = None
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    if FIGURE_CACHE_DIR:
+        path = os.path.join(FIGURE_CACHE_DIR, f'{digest}.png')
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            # O mtime marca o último uso, para que as figuras usadas fiquem no diretório
+            os.utime(path)
+        except OSError:
+            pass
+        else:
+            instrumentation.count('figure_disk_hit')
+            return png
+
+    shared = cache_backends.get_backend()
+    png = shared.get(f'figure:{digest}')
+    if png is not None:
+        return png
+
+    args = ()
+    if load is not None:
+        with instrumentation.stage('load'):
+            args = (load(),)
+
+    # O pyplot e os rcParams são globais ao processo, então uma figura é desenhada por vez
+    with _render_lock, mpl.rc_context(rc or {}):
+        with instrumentation.stage('draw'):
+            fig = draw(*args)
+        with instrumentation.stage('savefig'):
+            png = _savefig(fig)
+            plt.close(fig)
+
+    if path:
+        os.makedirs(FIGURE_CACHE_DIR, exist_ok=True)
+        # Réplicas que compartilham o diretório podem gravar a mesma figura ao mesmo tempo
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+        _prune_figure_dir()
+    shared.set(f'figure:{digest}', png, ttl=FIGURE_SHARED_TTL)
+
+    return png
+
+
+def _prune_figure_dir():
+    '''
+    Apaga as figuras usadas há mais tempo até o diretório FIGURE_CACHE_DIR
+    ficar abaixo de FIGURE_CACHE_DIR_MAX_BYTES
+    '''
+    files = []
+    for entry in os.scandir(FIGURE_CACHE_DIR):
+        if not entry.name.endswith('.png'):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= FIGURE_CACHE_DIR_MAX_BYTES:
+            break
+        # Outra réplica pode ter apagado o arquivo antes
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+@st.cache_resource
+def load_title_font():
+    '''
+    Carrega a fonte Roboto Slab dos títulos uma vez por processo, a partir de um
+    arquivo local baixado no primeiro uso
+
+    Returns:
+        font (FontProperties): Fonte dos títulos, ou a fonte padrão do matplotlib
+            quando o arquivo não está disponível
+    '''
+    if not os.path.exists(TITLE_FONT_PATH):
+        if data_source.OFFLINE:
+            return FontProperties()
+        try:
+            response = data_source.get_session().get(TITLE_FONT_URL)
+            response.raise_for_status()
+        except requests.RequestException:
+            return FontProperties()
+        os.makedirs(os.path.dirname(TITLE_FONT_PATH), exist_ok=True)
+        with open(TITLE_FONT_PATH + '.tmp', 'wb') as f:
+            f.write(response.content)
+        os.replace(TITLE_FONT_PATH + '.tmp', TITLE_FONT_PATH)
+
+    return FontProperties(fname=TITLE_FONT_PATH)
+
+
+def load_match(match_id, season=None, store=None) -> warehouse.MatchEvents:
+    '''
+    Carrega os eventos, escalações táticas e freeze frames da partida pelo armazém
+    Parquet, reaproveitando o que já está em memória
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida; buscada nas partidas carregadas quando omitida
+        store (EventStore): Armazenamento a ser usado; necessário fora da thread do Streamlit
+
+    Returns:
+        match (warehouse.MatchEvents): Tabelas normalizadas da partida
+    '''
+    match_id = int(match_id)
+    store = store or get_event_store()
+    return store.get(
+        ('match', match_id),
+        lambda: load_shared_match(match_id, season or match_season(match_id)))
+
+
+def load_shared_match(match_id, season) -> warehouse.MatchEvents:
+    '''
+    Lê as tabelas da partida do cache compartilhado entre processos ou, se
+    ausentes, do armazém, gravando-as no cache
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        match (warehouse.MatchEvents): Tabelas normalizadas da partida
+    '''
+    shared = cache_backends.get_backend()
+    keys = [f'match:{match_id}:{name}' for name in warehouse.MatchEvents._fields]
+    frames = [shared.get_frame(key) for key in keys]
+    if all(frame is not None for frame in frames):
+        return warehouse.MatchEvents(*frames)
+
+    match = warehouse.load_match(match_id, season)
+    for key, frame in zip(keys, match):
+        shared.set_frame(key, frame)
+    return match
+
+
+def load_events(match_id, season=None, store=None) -> pd.DataFrame:
+    '''
+    Carrega os eventos da partida pelo armazém Parquet, reaproveitando o que já está em memória
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida; buscada nas partidas carregadas quando omitida
+        store (EventStore): Armazenamento a ser usado; necessário fora da thread do Streamlit
+
+    Returns:
+        events (pd.DataFrame): DataFrame com os eventos normalizados da partida
+    '''
+    return load_match(match_id, season, store).events
+
+
+def load_event_index(match_id, store=None) -> warehouse.EventIndex:
+    '''
+    Carrega o índice por tempo e por posse de bola dos eventos da partida,
+    montado uma vez e mantido em memória
+
+    Args:
+        match_id (int): ID da partida
+        store (EventStore): Armazenamento a ser usado; necessário fora da thread do Streamlit
+
+    Returns:
+        index (warehouse.EventIndex): Índice dos eventos da partida
+    '''
+    match_id = int(match_id)
+    store = store or get_event_store()
+    return store.get(('event_index', match_id),
+                     lambda: warehouse.EventIndex(load_events(match_id, store=store)))
+
+
+def minute_range_slider(index: warehouse.EventIndex, key: str) -> tuple:
+    '''
+    Exibe um controle para escolher o intervalo de minutos da partida
+
+    Args:
+        index (warehouse.EventIndex): Índice dos eventos da partida
+        key (str): Chave do widget
+
+    Returns:
+        start, end (tuple): Primeiro e último minuto incluídos
+    '''
+    last = max(index.max_minute, 1)
+    return st.slider('Minutos', 0, last, (0, last), key=key)
+
+
+def load_lineups(match_id, store=None) -> pd.DataFrame:
+    '''
+    Carrega as escalações da partida, lidas apenas quando alguma visualização
+    precisa delas e mantidas em memória
+
+    Args:
+        match_id (int): ID da partida
+        store (EventStore): Armazenamento a ser usado; necessário fora da thread do Streamlit
+
+    Returns:
+        lineups (pd.DataFrame): Escalações indexadas por (team, player_id)
+    '''
+    match_id = int(match_id)
+    store = store or get_event_store()
+    return store.get(
+        ('lineups', match_id),
+        lambda: cache_backends.get_backend().get_or_load_frame(
+            f'lineups:{match_id}',
+            lambda: warehouse.parse_lineups(data_source.get_json(f'lineups/{match_id}.json'))))
+
+
+def match_season(match_id) -> str:
+    '''
+    Retorna a temporada de uma partida da Copa do Mundo
+
+    Args:
+        match_id (int): ID da partida
+
+    Returns:
+        season (str): Temporada da partida
+    '''
+    return load_catalogue().matches.at[match_id, 'season']
 
 
 @st.cache_data
+@instrumentation.timed
 def load_data() -> pd.DataFrame:
     '''
-    Carrega os dados da api StatsBomb e filtra as partidas da Copa do Mundo FIFA
+    Carrega os dados da api StatsBomb e filtra as partidas da Copa do Mundo FIFA,
+    reaproveitando o catálogo do cache compartilhado entre processos
+
+    Returns:
+        matches (pd.DataFrame): DataFrame com as partidas da Copa do Mundo FIFA
+    '''
+    return cache_backends.get_backend().get_or_load_frame(
+        'catalogue', fetch_matches, ttl=CATALOGUE_TTL)
+
+
+def fetch_matches() -> pd.DataFrame:
+    '''
+    Busca as partidas da Copa do Mundo FIFA de todas as temporadas
 
     Returns:
         matches (pd.DataFrame): DataFrame com as partidas da Copa do Mundo FIFA
@@ -35,6 +473,60 @@ def load_data() -> pd.DataFrame:
     return matches
 
 
+class MatchCatalogue:
+    '''
+    Catálogo das partidas indexado por temporada e por match_id, com um rótulo
+    único por partida (data, fase e times) para exibição nos seletores
+
+    Args:
+        matches (pd.DataFrame): DataFrame com as partidas da Copa do Mundo FIFA
+    '''
+
+    def __init__(self, matches):
+        matches = matches.sort_values(['match_date', 'kick_off'], kind='stable')
+        matches.index = matches['match_id'].to_numpy()
+
+        self.matches = matches
+        self.seasons = list(pd.unique(matches['season'].sort_values(ascending=False)))
+        self.season_matches = {season: season_matches
+                               for season, season_matches in matches.groupby('season', sort=False)}
+        self.by_season = {season: season_matches.index.tolist()
+                          for season, season_matches in self.season_matches.items()}
+
+        labels = (matches['match_date'].astype(str) + ' · ' +
+                  matches['competition_stage'].astype(str) + ' · ' +
+                  matches['home_team'] + ' x ' + matches['away_team'])
+        # Garante rótulos únicos mesmo que data, fase e times coincidam
+        duplicated = labels.duplicated(keep=False)
+        labels[duplicated] += ' (' + matches.index[duplicated].astype(str) + ')'
+        self.labels = labels.to_dict()
+
+    def match(self, match_id) -> pd.DataFrame:
+        '''
+        Retorna as informações de uma partida
+
+        Args:
+            match_id (int): ID da partida
+
+        Returns:
+            selected_match (pd.DataFrame): DataFrame com uma linha para a partida
+        '''
+        return self.matches.loc[[match_id]]
+
+
+@st.cache_resource
+@instrumentation.timed
+def load_catalogue() -> MatchCatalogue:
+    '''
+    Monta o catálogo de partidas uma vez por processo
+
+    Returns:
+        catalogue (MatchCatalogue): Catálogo das partidas da Copa do Mundo FIFA
+    '''
+    return MatchCatalogue(load_data())
+
+
+@instrumentation.timed
 def display_match_info(selected_match):
     '''
     Exibe as informações gerais da partida selecionada na tela do Streamlit 
@@ -69,6 +561,7 @@ def display_match_info(selected_match):
     col4.write(selected_match['stadium'].values[0])
 
 
+@instrumentation.timed
 def display_formations(selected_match):
     '''
     Exibe as formações dos times da partida selecionada na tela do Streamlit
@@ -77,29 +570,25 @@ def display_formations(selected_match):
         selected_match (pd.DataFrame): DataFrame com as informações da partida selecionada
     '''
     st.write('## Formações')
-    parser = Sbopen(dataframe=True)
-
-    roboto_bold = FontManager(
-        'https://raw.githubusercontent.com/google/fonts/main/apache/robotoslab/RobotoSlab%5Bwght%5D.ttf')
-    path_eff = [path_effects.Stroke(linewidth=3, foreground='white'),
-                path_effects.Normal()]
-
-    event, related, freeze, tactics = parser.event(
-        selected_match['match_id'].values[0])
 
+    match_id = selected_match['match_id'].values[0]
     home_team = selected_match['home_team'].values[0]
     away_team = selected_match['away_team'].values[0]
 
-    def get_starting_xi(team_name):
-        starting_xi_event = event.loc[((event['type_name'] == 'Starting XI') &
-                                       (event['team_name'] == team_name)), ['id', 'tactics_formation']]
-        starting_xi = tactics.merge(starting_xi_event, on='id')
-        starting_xi['player_name'] = starting_xi['player_name'].apply(lambda name: ' '.join(
-            [name.split()[0], name.split()[-1]]) if pd.notnull(name) else name)
-        return starting_xi
+    title_font = load_title_font()
+    path_eff = [path_effects.Stroke(linewidth=3, foreground='white'),
+                path_effects.Normal()]
 
-    home_starting_xi = get_starting_xi(home_team)
-    away_starting_xi = get_starting_xi(away_team)
+    def get_starting_xi(lineups, tactics, team_name):
+        starting_xi = lineups.loc[team_name]
+        starting_xi = starting_xi[starting_xi['start_reason'] == 'Starting XI'].reset_index()
+        starting_xi['tactics_formation'] = tactics.loc[
+            ('Starting XI', team_name), 'tactics_formation'].iloc[0]
+        names = starting_xi['player_nickname'].fillna(starting_xi['player_name']).astype(str)
+        starting_xi['label'] = [f"{number}\n{name.split()[0]}\n{name.split()[-1]}"
+                                if len(name.split()) > 1 else f'{number}\n{name}'
+                                for number, name in zip(starting_xi['jersey_number'], names)]
+        return starting_xi
 
     world_teams_colors = {
         'Argentina': ('#75AADB', '#FFFFFF'),
@@ -188,48 +677,481 @@ def display_formations(selected_match):
                               line_color='white', goal_type='box')
         pitch.draw(ax=ax)
         ax_text = pitch.formation(formation, positions=starting_xi.position_id, kind='text',
-                                  text=starting_xi.player_name.str.replace(
-                                      ' ', '\n'),
+                                  text=starting_xi.label,
                                   va='center', ha='center', fontsize=12, ax=ax)
-        mpl.rcParams['hatch.linewidth'] = 3
-        mpl.rcParams['hatch.color'] = team_colors[0]
-        pitch.formation(formation, positions=starting_xi.position_id, kind='scatter',
-                        c=team_colors[1], hatch='| |', linewidth=3, s=500,
-                        xoffset=-8, ax=ax)
+        with mpl.rc_context({'hatch.color': team_colors[0]}):
+            pitch.formation(formation, positions=starting_xi.position_id, kind='scatter',
+                            c=team_colors[1], hatch='| |', linewidth=3, s=500,
+                            xoffset=-8, ax=ax)
         ax.set_title(f'{team_name}', fontsize=40,
-                     fontproperties=roboto_bold.prop, color='black', path_effects=path_eff)
+                     fontproperties=title_font, color='black', path_effects=path_eff)
 
-    with st.spinner('Carregando formações...'):
-        time.sleep(5)
+    def load():
+        return load_lineups(match_id), load_match(match_id).tactics
+
+    def draw(data):
+        lineups, tactics = data
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 8.72))
-        plot_formation(home_team, home_starting_xi, ax1)
-        plot_formation(away_team, away_starting_xi, ax2)
+        plot_formation(home_team, get_starting_xi(lineups, tactics, home_team), ax1)
+        plot_formation(away_team, get_starting_xi(lineups, tactics, away_team), ax2)
+        return fig
+
+    with st.spinner('Carregando formações...'):
+        png = render_figure(('formations', int(match_id)), draw, rc={'hatch.linewidth': 3},
+                            load=load)
+    st.image(png, use_column_width=True, output_format='PNG')
+
 
-        st.pyplot(fig)
+EVENT_PAGE_SIZES = [25, 50, 100, 250]
 
 
+def search_events(events: pd.DataFrame, columns: list, text: str) -> pd.DataFrame:
+    '''
+    Filtra os eventos que contêm o texto em alguma das colunas, sem diferenciar
+    maiúsculas. Nas colunas categóricas a busca é feita só nas categorias, e
+    valores ausentes nunca são encontrados.
+
+    Args:
+        events (pd.DataFrame): Eventos a serem filtrados
+        columns (list): Colunas pesquisadas
+        text (str): Texto procurado
+
+    Returns:
+        events (pd.DataFrame): Eventos que contêm o texto
+    '''
+    mask = np.zeros(len(events), dtype=bool)
+    for column in columns:
+        values = events[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            hits = values.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            mask |= np.isin(values.cat.codes.to_numpy(), np.flatnonzero(hits))
+        else:
+            # Sem o notna, 'nan' e 'None' das células vazias seriam encontrados por textos como 'an'
+            hits = values.astype(str).str.contains(text, case=False, regex=False)
+            mask |= (hits & values.notna()).to_numpy()
+    return events[mask]
+
+
+def events_page(events: pd.DataFrame, columns: list, sort_by=None, ascending=True,
+                page=1, page_size=EVENT_PAGE_SIZES[0]) -> pd.DataFrame:
+    '''
+    Ordena os eventos e retorna apenas as linhas e colunas da página pedida
+
+    Args:
+        events (pd.DataFrame): Eventos filtrados
+        columns (list): Colunas exibidas
+        sort_by (str): Coluna de ordenação; ordem da partida quando omitida
+        ascending (bool): Se a ordenação é crescente
+        page (int): Número da página, a partir de 1
+        page_size (int): Linhas por página
+
+    Returns:
+        page (pd.DataFrame): Linhas da página com as colunas escolhidas
+    '''
+    order = events.index
+    if sort_by is not None:
+        order = events[sort_by].sort_values(ascending=ascending, kind='stable',
+                                            na_position='last').index
+    rows = order[(page - 1) * page_size:page * page_size]
+    return events.loc[rows, columns]
+
+
+@instrumentation.timed
 def display_events_dataframe(selected_match_id):
     '''
-    Exibe um DataFrame com os eventos da partida selecionada na tela do Streamlit
+    Exibe uma tabela paginada com os eventos da partida selecionada na tela do
+    Streamlit. Apenas a página visível e as colunas escolhidas são enviadas.
 
     Args:
-        selected_match_id (int): ID da partida selecionada 
+        selected_match_id (int): ID da partida selecionada
     '''
     st.write('## Eventos da partida')
-    events = sb.events(match_id=selected_match_id)
+    with st.spinner('Carregando eventos da partida...'):
+        index = load_event_index(selected_match_id)
 
-    event_types = events['type'].unique()
-    selected_event_type = st.selectbox(
+    event_types = index.events['type'].unique()
+    col1, col2 = st.columns(2)
+    selected_event_type = col1.selectbox(
         'Selecione o tipo de evento', event_types, key='event_type_selectbox')
+    with col2:
+        start, end = minute_range_slider(index, key='events_minute_slider')
+
+    available_columns = index.type_columns(selected_event_type)
+    columns = st.multiselect('Colunas', available_columns, default=available_columns,
+                             key=f'events_columns_{selected_event_type}')
+    if not columns:
+        st.write('Selecione ao menos uma coluna')
+        return
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    search = col1.text_input('Buscar', key='events_search_input')
+    sort_by = col2.selectbox('Ordenar por', columns, key=f'events_sort_{selected_event_type}',
+                             index=columns.index('index') if 'index' in columns else 0)
+    ascending = col3.radio('Ordem', ['Crescente', 'Decrescente'],
+                           key='events_order_radio') == 'Crescente'
+    page_size = col4.selectbox('Linhas', EVENT_PAGE_SIZES, key='events_page_size_selectbox')
+
+    events = index.window(start, end, types=[selected_event_type])
+    if search:
+        events = search_events(events, columns, search)
+
+    pages = max(1, -(-len(events) // page_size))
+    # A chave muda com o número de páginas, o que volta à primeira página quando os filtros mudam
+    page = st.number_input('Página', min_value=1, max_value=pages, value=1,
+                           key=f'events_page_number_{pages}')
+
+    st.dataframe(events_page(events, columns, sort_by, ascending, page, page_size),
+                 use_container_width=True, hide_index=True)
+    first = (page - 1) * page_size + 1 if len(events) else 0
+    st.caption(f'Eventos {first}–{min(page * page_size, len(events))} de {len(events)} '
+               f'· página {page} de {pages}')
+
+
+def display_export(scopes: dict, key: str):
+    '''
+    Exibe as opções de download de eventos. O arquivo só é gerado quando o
+    usuário pede, escrito em blocos no formato escolhido.
+
+    Args:
+        scopes (dict): Nome do escopo -> (nome do arquivo, função que retorna os eventos)
+        key (str): Prefixo das chaves dos widgets
+    '''
+    with st.expander('Download dos eventos'):
+        col1, col2 = st.columns(2)
+        scope = col1.selectbox('Eventos', list(scopes), key=f'{key}_export_scope')
+        fmt = col2.selectbox('Formato', list(export.FORMATS), key=f'{key}_export_format')
+
+        if st.button('Preparar arquivo', key=f'{key}_export_button'):
+            name, get_events = scopes[scope]
+            extension, mime = export.FORMATS[fmt]
+            with st.spinner('Gerando arquivo...'):
+                with export.export_to_file(get_events(), fmt) as f:
+                    data = f.read()
+            st.download_button(
+                label=f'Download ({fmt})',
+                data=data,
+                file_name=f'{name}_events.{extension}',
+                mime=mime,
+                key=f'{key}_download_button'
+            )
+
+
+def plot_pass_map(pass_events: pd.DataFrame):
+    '''
+    Desenha os passes em um campo, com uma única chamada de `arrows` para os
+    passes concluídos e outra para os incompletos
+
+    Args:
+        pass_events (pd.DataFrame): DataFrame com os eventos de passe
+
+    Returns:
+        fig (plt.Figure): Figura com o mapa de passes
+    '''
+    pitch = Pitch(pitch_color='grass',
+                  line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    x, y, x_end, y_end = pass_events[['location_x', 'location_y',
+                                      'pass_end_location_x', 'pass_end_location_y']].to_numpy().T
+    if 'pass_outcome' in pass_events.columns:
+        completed = pass_events['pass_outcome'].isna().to_numpy()
+    else:
+        completed = np.ones(len(pass_events), dtype=bool)
+
+    for mask, color, alpha, label in ((completed, 'blue', 0.7, 'Passes Concluídos'),
+                                      (~completed, 'red', 0.5, 'Passes Incompletos')):
+        if mask.any():
+            pitch.arrows(x[mask], y[mask], x_end[mask], y_end[mask], color=color,
+                         alpha=alpha, ax=ax, width=2, label=label)
+
+    if len(pass_events):
+        ax.legend(loc='upper left', fontsize='small')
+
+    return fig
+
+
+def build_up_segments(build_up: pd.DataFrame) -> np.ndarray:
+    '''
+    Retorna origem e destino dos passes e conduções das jogadas que levaram aos chutes
+
+    Args:
+        build_up (pd.DataFrame): Eventos das jogadas, como em `EventIndex.shot_chains`
+
+    Returns:
+        segments (np.ndarray): Uma linha (x, y, x_fim, y_fim) por passe ou condução
+    '''
+    parts = []
+    for event_type, prefix in (('Pass', 'pass_end_location'), ('Carry', 'carry_end_location')):
+        if f'{prefix}_x' in build_up.columns:
+            events = build_up[build_up['type'] == event_type]
+            parts.append(events[['location_x', 'location_y',
+                                 f'{prefix}_x', f'{prefix}_y']].to_numpy(np.float32))
+    return np.concatenate(parts) if parts else np.empty((0, 4), dtype=np.float32)
+
+
+def plot_shot_map(shot_events: pd.DataFrame, build_up=None):
+    '''
+    Desenha os chutes em um campo, com uma única chamada de `scatter` para os
+    gols e outra para os demais chutes
+
+    Args:
+        shot_events (pd.DataFrame): DataFrame com os eventos de chute
+        build_up (pd.DataFrame): Jogadas que levaram aos chutes, desenhadas quando informadas
+
+    Returns:
+        fig (plt.Figure): Figura com o mapa de chutes
+    '''
+    pitch = Pitch(pitch_color='grass',
+                  line_color='white', line_zorder=2)
+    fig, ax = pitch.draw()
+
+    if build_up is not None:
+        segments = build_up_segments(build_up)
+        if len(segments):
+            pitch.lines(*segments.T, color='white', alpha=0.6, lw=1.5, zorder=1, ax=ax,
+                        label='Jogada até o chute')
+
+    x, y = shot_events[['location_x', 'location_y']].to_numpy().T
+    goals = (shot_events['shot_outcome'] == 'Goal').to_numpy()
+
+    for mask, color, marker, label in ((goals, 'blue', 'o', 'Gol'),
+                                       (~goals, 'red', 'x', 'Chute')):
+        if mask.any():
+            pitch.scatter(x[mask], y[mask], color=color, marker=marker, ax=ax, label=label)
+
+    if len(shot_events):
+        ax.legend(loc='upper left', fontsize='small')
+
+    return fig
+
+
+MAP_RENDERERS = ['Imagem', 'Interativo (WebGL)']
+MAP_GROUPS = ['Resultado', 'Parte do corpo']
+MINUTE_BUCKETS = [0, 15, 30, 45, 60, 75, 90]
+PITCH_COLOR = '#a8bc95'
+MAP_COLORS = ['#1f4e9c', '#d62728', '#ff7f0e', '#9467bd', '#17becf', '#8c564b', '#e377c2']
+
+
+def plot_pitch() -> go.Figure:
+    '''
+    Desenha um campo nas dimensões da StatsBomb (120 x 80) com formas do Plotly,
+    que o navegador desenha sem enviar imagem
+
+    Returns:
+        fig (go.Figure): Figura vazia com o campo
+    '''
+    line = dict(color='white', width=2)
+    rects = [(0, 0, 120, 80), (0, 18, 18, 62), (102, 18, 120, 62),
+             (0, 30, 6, 50), (114, 30, 120, 50), (-2, 36, 0, 44), (120, 36, 122, 44)]
+    shapes = [dict(type='rect', x0=x0, y0=y0, x1=x1, y1=y1, line=line, layer='below')
+              for x0, y0, x1, y1 in rects]
+    shapes += [
+        dict(type='line', x0=60, y0=0, x1=60, y1=80, line=line, layer='below'),
+        dict(type='circle', x0=50, y0=30, x1=70, y1=50, line=line, layer='below'),
+    ]
+    shapes += [dict(type='circle', x0=x - 0.4, y0=39.6, x1=x + 0.4, y1=40.4, line=line,
+                    fillcolor='white', layer='below') for x in (12, 60, 108)]
+
+    fig = go.Figure()
+    fig.update_layout(
+        shapes=shapes,
+        plot_bgcolor=PITCH_COLOR,
+        xaxis=dict(range=[-3, 123], visible=False, constrain='domain'),
+        # A StatsBomb mede y de cima para baixo
+        yaxis=dict(range=[81, -1], visible=False, scaleanchor='x', scaleratio=1),
+        margin=dict(l=10, r=10, t=30, b=10),
+        legend=dict(orientation='h', y=1.02, yanchor='bottom', x=0),
+        dragmode='zoom',
+    )
+    return fig
+
+
+def _minute_buckets(minutes: np.ndarray) -> np.ndarray:
+    return np.clip(np.searchsorted(MINUTE_BUCKETS, minutes, side='right') - 1,
+                   0, len(MINUTE_BUCKETS) - 1)
+
+
+def _bucket_label(bucket: int) -> str:
+    start = MINUTE_BUCKETS[bucket]
+    if bucket == len(MINUTE_BUCKETS) - 1:
+        return f"{start}'+"
+    return f"{start}-{MINUTE_BUCKETS[bucket + 1]}'"
+
+
+def _add_minute_slider(fig: go.Figure, buckets: list):
+    '''
+    Adiciona um controle deslizante que mostra apenas os traços de um intervalo de
+    minutos, no navegador, sem nova execução. O controle muda a opacidade dos
+    traços e não a visibilidade, que fica com a legenda, de modo que os dois
+    filtros funcionam juntos.
 
-    filtered_events = events[events['type'] == selected_event_type]
+    Args:
+        fig (go.Figure): Figura com um traço por grupo e intervalo de minutos
+        buckets (list): Intervalo de minutos de cada traço, na ordem dos traços; None
+            para traços sempre visíveis
+    '''
+    opacity = [1 if trace.opacity is None else trace.opacity for trace in fig.data]
+    hoverinfo = [trace.hoverinfo or 'all' for trace in fig.data]
+
+    def restyle(shown):
+        return [{'opacity': [value if show else 0 for value, show in zip(opacity, shown)],
+                 'hoverinfo': [value if show else 'skip' for value, show in zip(hoverinfo, shown)]}]
+
+    steps = [dict(label='Todos', method='restyle', args=restyle([True] * len(buckets)))]
+    steps += [dict(label=_bucket_label(bucket), method='restyle',
+                   args=restyle([trace_bucket in (None, bucket) for trace_bucket in buckets]))
+              for bucket in sorted(set(buckets) - {None})]
+    fig.update_layout(sliders=[dict(steps=steps, currentvalue=dict(prefix='Minutos: '),
+                                    pad=dict(t=10))])
+
+
+def _add_legend_entry(fig: go.Figure, group: str, color: str, mode: str):
+    # Traço sem pontos, sempre visível, que mantém o grupo na legenda em qualquer
+    # intervalo de minutos
+    fig.add_trace(go.Scattergl(
+        x=[None], y=[None], mode=mode, line=dict(color=color, width=1.5),
+        marker=dict(color=color, size=7), name=group, legendgroup=group,
+        hoverinfo='skip'))
+
+
+def _map_groups(events: pd.DataFrame, column: str, default: str) -> np.ndarray:
+    if column not in events.columns:
+        return np.full(len(events), default, dtype=object)
+    return events[column].astype(object).fillna(default).to_numpy()
+
+
+def plot_pass_map_interactive(pass_events: pd.DataFrame, group_by=MAP_GROUPS[0]) -> go.Figure:
+    '''
+    Monta o mapa de passes interativo com `Scattergl`. Cada passe é um segmento
+    da origem ao destino, e há um traço por grupo e intervalo de minutos, de modo
+    que a legenda e o controle de minutos filtram os passes no navegador.
 
-    filtered_events = filtered_events.dropna(axis=1, how='all')
+    Args:
+        pass_events (pd.DataFrame): DataFrame com os eventos de passe
+        group_by (str): Um de MAP_GROUPS, usado para as cores e a legenda
 
-    st.write(filtered_events)
+    Returns:
+        fig (go.Figure): Mapa de passes interativo
+    '''
+    fig = plot_pitch()
+    if group_by == 'Parte do corpo':
+        groups = _map_groups(pass_events, 'pass_body_part', 'Outra')
+    else:
+        groups = _map_groups(pass_events, 'pass_outcome', 'Complete')
+
+    # Décimos de jarda bastam para o desenho e deixam o JSON enviado ao navegador menor
+    coordinates = pass_events[['location_x', 'location_y',
+                               'pass_end_location_x', 'pass_end_location_y']].to_numpy().round(1)
+    minutes = pass_events['minute'].to_numpy()
+    buckets = _minute_buckets(minutes)
+    players = pass_events['player'].astype(object).to_numpy()
+    gap = np.full(len(pass_events), np.nan, dtype=np.float32)
+
+    trace_buckets = []
+    for i, group in enumerate(pd.unique(groups)):
+        color = MAP_COLORS[i % len(MAP_COLORS)]
+        _add_legend_entry(fig, str(group), color, 'lines+markers')
+        trace_buckets.append(None)
+        for bucket in np.unique(buckets[groups == group]):
+            mask = (groups == group) & (buckets == bucket)
+            n = int(mask.sum())
+            # Origem, destino e um ponto vazio que separa os segmentos
+            x = np.column_stack([coordinates[mask, 0], coordinates[mask, 2], gap[:n]]).ravel()
+            y = np.column_stack([coordinates[mask, 1], coordinates[mask, 3], gap[:n]]).ravel()
+            labels = [f"{player} · {minute}'" for player, minute in zip(players[mask], minutes[mask])]
+            text = np.column_stack([np.full(n, ''), labels, np.full(n, '')]).ravel()
+            fig.add_trace(go.Scattergl(
+                x=x, y=y, mode='lines+markers', text=text, hoverinfo='text',
+                line=dict(color=color, width=1.5),
+                marker=dict(color=color, size=np.tile([3, 7, 0], n)),
+                name=str(group), legendgroup=str(group), showlegend=False,
+            ))
+            trace_buckets.append(int(bucket))
+
+    _add_minute_slider(fig, trace_buckets)
+    return fig
+
+
+def plot_shot_map_interactive(shot_events: pd.DataFrame, group_by=MAP_GROUPS[0],
+                              build_up=None) -> go.Figure:
+    '''
+    Monta o mapa de chutes interativo com `Scattergl`, com o tamanho dos pontos
+    proporcional ao xG e um traço por grupo e intervalo de minutos
 
+    Args:
+        shot_events (pd.DataFrame): DataFrame com os eventos de chute
+        group_by (str): Um de MAP_GROUPS, usado para as cores e a legenda
+        build_up (pd.DataFrame): Jogadas que levaram aos chutes, desenhadas quando informadas
 
-def display_pass_map(selected_match_id, home_team, away_team):
+    Returns:
+        fig (go.Figure): Mapa de chutes interativo
+    '''
+    fig = plot_pitch()
+    trace_buckets = []
+    if build_up is not None:
+        segments = build_up_segments(build_up).round(1)
+        gap = np.full(len(segments), np.nan, dtype=np.float32)
+        fig.add_trace(go.Scattergl(
+            x=np.column_stack([segments[:, 0], segments[:, 2], gap]).ravel(),
+            y=np.column_stack([segments[:, 1], segments[:, 3], gap]).ravel(),
+            mode='lines', line=dict(color='white', width=1.5), opacity=0.6,
+            hoverinfo='skip', name='Jogada até o chute',
+        ))
+        trace_buckets.append(None)
+    if group_by == 'Parte do corpo':
+        groups = _map_groups(shot_events, 'shot_body_part', 'Outra')
+    else:
+        groups = _map_groups(shot_events, 'shot_outcome', 'Unknown')
+
+    x, y = shot_events[['location_x', 'location_y']].to_numpy().round(1).T
+    minutes = shot_events['minute'].to_numpy()
+    buckets = _minute_buckets(minutes)
+    players = shot_events['player'].astype(object).to_numpy()
+    outcomes = _map_groups(shot_events, 'shot_outcome', 'Unknown')
+    if 'shot_statsbomb_xg' in shot_events.columns:
+        xg = shot_events['shot_statsbomb_xg'].fillna(0).to_numpy()
+    else:
+        xg = np.zeros(len(shot_events))
+
+    for i, group in enumerate(pd.unique(groups)):
+        color = MAP_COLORS[i % len(MAP_COLORS)]
+        _add_legend_entry(fig, str(group), color, 'markers')
+        trace_buckets.append(None)
+        for bucket in np.unique(buckets[groups == group]):
+            mask = (groups == group) & (buckets == bucket)
+            text = [f"{player} · {minute}' · {outcome} · xG {value:.2f}"
+                    for player, minute, outcome, value
+                    in zip(players[mask], minutes[mask], outcomes[mask], xg[mask])]
+            fig.add_trace(go.Scattergl(
+                x=x[mask], y=y[mask], mode='markers', text=text, hoverinfo='text',
+                marker=dict(color=color, size=8 + 30 * xg[mask],
+                            symbol=np.where(outcomes[mask] == 'Goal', 'circle', 'x'),
+                            line=dict(color='white', width=1)),
+                name=str(group), legendgroup=str(group), showlegend=False,
+            ))
+            trace_buckets.append(int(bucket))
+
+    _add_minute_slider(fig, trace_buckets)
+    return fig
+
+
+def display_interactive_map(plot, events: pd.DataFrame, key: str, **options):
+    '''
+    Exibe um mapa interativo com a escolha do agrupamento das cores
+
+    Args:
+        plot (callable): plot_pass_map_interactive ou plot_shot_map_interactive
+        events (pd.DataFrame): Eventos do mapa
+        key (str): Prefixo das chaves dos widgets
+        **options: Argumentos adicionais da função `plot`
+    '''
+    group_by = st.radio('Cores por', MAP_GROUPS, key=f'{key}_group_radio', horizontal=True)
+    st.plotly_chart(plot(events, group_by, **options), use_container_width=True,
+                    key=f'{key}_chart')
+
+
+@instrumentation.timed
+def display_pass_map(selected_match_id, home_team, away_team, interactive=False):
     '''
     Exibe um mapa de passes de um jogador selecionado na tela do Streamlit
 
@@ -237,68 +1159,49 @@ def display_pass_map(selected_match_id, home_team, away_team):
         selected_match_id (int): ID da partida selecionada
         home_team (str): Nome do time da casa
         away_team (str): Nome do time visitante
+        interactive (bool): Se o mapa é desenhado no navegador com WebGL em vez de PNG
     '''
     st.write('## Mapa de Passe')
     st.write('Selecione um time e um jogador para visualizar o mapa de passes')
 
     selected_team = st.selectbox(
         'Selecione time', [home_team, away_team], key='pass_team_selectbox')
-    events = sb.events(match_id=selected_match_id)
+    with st.spinner('Carregando eventos da partida...'):
+        events = load_events(selected_match_id)
     team_events = events[events['team'] == selected_team]
     players = team_events['player'].unique()
     players = players[~pd.isna(players)]
     selected_player = st.selectbox(
         'Selecione jogador', players, key='pass_player_selectbox', index=0)
 
-    with st.spinner('Carregando mapa de passes...'):
-        time.sleep(5)
+    # No modo interativo o intervalo de minutos é escolhido no próprio mapa, sem nova execução
+    start, end = None, None
+    if not interactive:
+        start, end = minute_range_slider(load_event_index(selected_match_id),
+                                         key='pass_minute_slider')
 
+    with st.spinner('Carregando mapa de passes...'):
         player_events = team_events[team_events['player'] == selected_player]
-
-        pitch = Pitch(pitch_color='grass',
-                      line_color='white', line_zorder=2)
-        fig, ax = pitch.draw()
-
-        pass_events = player_events[player_events['type'] == 'Pass']
-
-        for _, event in pass_events.iterrows():
-            x = event['location'][0]
-            y = event['location'][1]
-            pass_end_location = event['pass_end_location']
-            x_end = pass_end_location[0]
-            y_end = pass_end_location[1]
-            pass_outcome = event['pass_outcome']
-
-            if pd.isna(pass_outcome):
-                color = 'blue'
-                alpha = 0.7
-                label = 'Passes Concluídos'
-            else:
-                color = 'red'
-                alpha = 0.5
-                label = 'Passes Incompletos'
-
-            pitch.arrows(x, y, x_end, y_end, color=color,
-                         alpha=alpha, ax=ax, width=2, label=label)
-
-        handles, labels = ax.get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        ax.legend(by_label.values(), by_label.keys(),
-                  loc='upper left', fontsize='small')
-
-        st.pyplot(fig)
-
-        csv = player_events.to_csv(index=False)
-        st.download_button(
-            label="Download dos eventos do jogador",
-            data=csv,
-            file_name=f'{selected_player}_events.csv',
-            mime='text/csv',
-            key='pass_map_download_button'
-        )
-
-
-def display_shot_map(selected_match_id, home_team, away_team):
+        pass_events = load_event_index(selected_match_id).window(
+            start, end, types=['Pass'], team=selected_team, player=selected_player)
+
+        if interactive:
+            display_interactive_map(plot_pass_map_interactive, pass_events, key='pass_map')
+        else:
+            png = render_figure(
+                ('pass_map', int(selected_match_id), selected_team, selected_player, start, end),
+                lambda: plot_pass_map(pass_events))
+            st.image(png, use_column_width=True, output_format='PNG')
+
+    display_export({
+        'Eventos do jogador': (selected_player, lambda: player_events),
+        'Eventos do time': (selected_team, lambda: team_events),
+        'Todos os eventos da partida': (f'partida_{selected_match_id}', lambda: events),
+    }, key='pass_map')
+
+
+@instrumentation.timed
+def display_shot_map(selected_match_id, home_team, away_team, interactive=False):
     '''
     Exibe um mapa de chutes de um jogador selecionado na tela do Streamlit
 
@@ -306,6 +1209,7 @@ def display_shot_map(selected_match_id, home_team, away_team):
         selected_match_id (int): ID da partida selecionada
         home_team (str): Nome do time da casa
         away_team (str): Nome do time visitante
+        interactive (bool): Se o mapa é desenhado no navegador com WebGL em vez de PNG
     '''
     st.write('## Mapa de Chute')
     st.write('Selecione um time e um jogador para visualizar o mapa de chutes')
@@ -313,7 +1217,8 @@ def display_shot_map(selected_match_id, home_team, away_team):
     selected_team = st.selectbox(
         'Selecione time', [home_team, away_team], key='shot_team_selectbox')
 
-    events = sb.events(match_id=selected_match_id)
+    with st.spinner('Carregando eventos da partida...'):
+        events = load_events(selected_match_id)
     team_events = events[events['team'] == selected_team]
     shot_events = team_events[team_events['type'] == 'Shot']
     players_with_shots = shot_events['player'].unique()
@@ -322,50 +1227,312 @@ def display_shot_map(selected_match_id, home_team, away_team):
     selected_player = st.selectbox(
         'Selecione jogador', players_with_shots, key='shot_player_selectbox', index=0)
 
-    with st.spinner('Carregando mapa de chutes...'):
-        time.sleep(5)
+    index = load_event_index(selected_match_id)
+    # No modo interativo o intervalo de minutos é escolhido no próprio mapa, sem nova execução
+    start, end = None, None
+    if not interactive:
+        start, end = minute_range_slider(index, key='shot_minute_slider')
+    show_build_up = st.toggle('Mostrar a jogada de cada chute', key='shot_build_up_toggle')
 
+    with st.spinner('Carregando mapa de chutes...'):
         player_events = team_events[team_events['player'] == selected_player]
+        player_shots = index.window(start, end, types=['Shot'], team=selected_team,
+                                    player=selected_player)
+        build_up = index.shot_chains(player_shots) if show_build_up else None
+
+        if interactive:
+            display_interactive_map(plot_shot_map_interactive, player_shots, key='shot_map',
+                                    build_up=build_up)
+        else:
+            png = render_figure(
+                ('shot_map', int(selected_match_id), selected_team, selected_player,
+                 start, end, show_build_up),
+                lambda: plot_shot_map(player_shots, build_up))
+            st.image(png, use_column_width=True, output_format='PNG')
+
+    display_export({
+        'Eventos do jogador': (selected_player, lambda: player_events),
+        'Eventos do time': (selected_team, lambda: team_events),
+        'Todos os eventos da partida': (f'partida_{selected_match_id}', lambda: events),
+    }, key='shot_map')
+
+
+RADAR_METRICS = {
+    'completed_dribbles': 'Dribles Completados',
+    'non_penalty_goals': 'Gols (exceto pênaltis)',
+    'ball_recoveries': 'Recuperações de Bola',
+    'tackles': 'Desarmes',
+    'blocks': 'Bloqueios',
+}
+
+RADAR_SCALES = ['Total', 'Por 90 minutos', 'Percentil']
+
+
+def load_player_stats(match_id, season=None, store=None) -> pd.DataFrame:
+    '''
+    Carrega a tabela de estatísticas por jogador da partida, reaproveitando o que já está em memória
 
-        pitch = Pitch(pitch_color='grass',
-                      line_color='white', line_zorder=2)
-        fig, ax = pitch.draw()
-
-        player_shot_events = player_events[player_events['type'] == 'Shot']
-
-        for _, event in player_shot_events.iterrows():
-            x = event['location'][0]
-            y = event['location'][1]
-            shot_outcome = event['shot_outcome']
-
-            if shot_outcome == 'Goal':
-                color = 'blue'
-                marker = 'o'
-                label = 'Gol'
-            else:
-                color = 'red'
-                marker = 'x'
-                label = 'Chute'
-
-            pitch.scatter(x, y, color=color, marker=marker, ax=ax, label=label)
-
-        handles, labels = ax.get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        ax.legend(by_label.values(), by_label.keys(),
-                  loc='upper left', fontsize='small')
-
-        st.pyplot(fig)
-
-        csv = player_events.to_csv(index=False)
-        st.download_button(
-            label="Download dos eventos do jogador",
-            data=csv,
-            file_name=f'{selected_player}_events.csv',
-            mime='text/csv',
-            key='shot_map_download_button'
-        )
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida; buscada nas partidas carregadas quando omitida
+        store (EventStore): Armazenamento a ser usado; necessário fora da thread do Streamlit
 
+    Returns:
+        stats (pd.DataFrame): Estatísticas indexadas por (team, player)
+    '''
+    match_id = int(match_id)
+    store = store or get_event_store()
+    return store.get(
+        ('player_stats', match_id),
+        lambda: cache_backends.get_backend().get_or_load_frame(
+            f'player_stats:{match_id}',
+            lambda: warehouse.load_match_stats(match_id, season or match_season(match_id))))
+
+
+@retry(retry=retry_if_exception_type(requests.RequestException),
+       stop=stop_after_attempt(4), wait=wait_exponential(multiplier=0.5, max=8), reraise=True)
+def load_match_data(store, match_id, season) -> tuple:
+    '''
+    Carrega os eventos e as estatísticas de uma partida, tentando novamente com
+    espera exponencial em caso de falha de rede
+
+    Args:
+        store (EventStore): Armazenamento de eventos das partidas
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        events, stats (tuple): Eventos normalizados e estatísticas por jogador da partida
+    '''
+    return (load_events(match_id, season, store),
+            load_player_stats(match_id, season, store))
+
+
+def iter_season_data(match_ids, season):
+    '''
+    Carrega várias partidas em paralelo, com no máximo MAX_CONCURRENT_LOADS
+    downloads simultâneos, entregando cada partida assim que ela fica pronta
+
+    Args:
+        match_ids (list): IDs das partidas
+        season (str): Temporada das partidas
+
+    Yields:
+        match_id, events, stats (tuple): ID, eventos e estatísticas de cada partida
+    '''
+    store = get_event_store()
+    workers = max(1, min(MAX_CONCURRENT_LOADS, len(match_ids)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(contextvars.copy_context().run,
+                                   load_match_data, store, match_id, season): match_id
+                   for match_id in match_ids}
+        for future in as_completed(futures):
+            events, stats = future.result()
+            yield futures[future], events, stats
+
+
+class Prefetcher:
+    '''
+    Carrega em segundo plano as partidas da temporada no EventStore, por ordem de
+    prioridade: a partida selecionada, depois as vizinhas no seletor e por fim as
+    demais. Um único pool limitado de threads atende todas as sessões.
 
+    Cada sessão tem seu próprio agendamento: quando a sessão escolhe outra
+    partida, o que ainda está na fila do agendamento anterior dela é descartado,
+    sem afetar a fila das outras sessões. Partidas já em memória são ignoradas e o
+    EventStore garante que uma partida sendo carregada não é buscada de novo.
+    Quando a memória fica escassa, apenas a partida selecionada e as vizinhas
+    continuam sendo carregadas.
+
+    Args:
+        store (EventStore): Armazenamento de eventos das partidas
+        workers (int): Número de threads de pré-carga
+    '''
+
+    def __init__(self, store, workers=PREFETCH_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._threads = []
+
+    def schedule(self, match_ids, season, selected_match_id, state=None):
+        '''
+        Agenda a pré-carga das partidas de uma temporada
+
+        Args:
+            match_ids (list): IDs das partidas na ordem do seletor
+            season (str): Temporada das partidas
+            selected_match_id (int): Partida selecionada, carregada primeiro
+            state (dict): Estado da sessão que guarda o agendamento atual dela;
+                por padrão, st.session_state
+        '''
+        state = st.session_state if state is None else state
+        previous = state.get('prefetch_schedule')
+        if previous is not None:
+            if previous[0] == (season, selected_match_id):
+                return
+            previous[1].set()
+        cancelled = threading.Event()
+        state['prefetch_schedule'] = ((season, selected_match_id), cancelled)
+
+        with self._lock:
+            self._start()
+
+        position = list(match_ids).index(selected_match_id)
+        for i, match_id in enumerate(match_ids):
+            # Prioridade é a distância até a partida selecionada no seletor
+            self._queue.put((abs(i - position), next(self._sequence), cancelled,
+                             int(match_id), season))
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name='prefetch', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def memory_pressure(self) -> bool:
+        '''
+        Verifica se o EventStore ou a memória do sistema estão perto do limite
+        '''
+        return (self.store.total_bytes >= self.store.max_bytes * PREFETCH_MAX_STORE_FILL or
+                psutil.virtual_memory().percent >= PREFETCH_MAX_SYSTEM_MEMORY)
+
+    def _work(self):
+        while True:
+            priority, _, cancelled, match_id, season = self._queue.get()
+            try:
+                if cancelled.is_set():
+                    instrumentation.count('prefetch_cancelled')
+                    continue
+                if all((kind, match_id) in self.store
+                       for kind in ('match', 'player_stats', 'lineups')):
+                    continue
+                if priority > PREFETCH_NEIGHBOURS and self.memory_pressure():
+                    instrumentation.count('prefetch_cancelled')
+                    continue
+                load_match_data(self.store, match_id, season)
+                load_lineups(match_id, self.store)
+                instrumentation.count('prefetch_loaded')
+            except Exception:
+                logger.exception('Falha na pré-carga da partida %s', match_id)
+            finally:
+                self._queue.task_done()
+
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    '''
+    Cria o pré-carregador de partidas compartilhado por todas as sessões do processo
+
+    Returns:
+        prefetcher (Prefetcher): Pré-carregador de partidas
+    '''
+    return Prefetcher(get_event_store())
+
+
+@st.cache_resource
+def get_season_rollup(season) -> warehouse.SeasonRollup:
+    '''
+    Cria o acumulado de estatísticas da temporada compartilhado por todas as sessões do processo
+
+    Args:
+        season (str): Temporada
+
+    Returns:
+        rollup (warehouse.SeasonRollup): Estatísticas acumuladas da temporada
+    '''
+    return warehouse.SeasonRollup()
+
+
+def load_season_rollup(season, match_ids) -> warehouse.SeasonRollup:
+    '''
+    Retorna o acumulado da temporada com todas as partidas, carregando em paralelo
+    apenas as estatísticas das partidas que ainda não foram somadas
+
+    Args:
+        season (str): Temporada
+        match_ids (list): IDs de todas as partidas da temporada
+
+    Returns:
+        rollup (warehouse.SeasonRollup): Estatísticas acumuladas da temporada
+    '''
+    rollup = get_season_rollup(season)
+    missing = [int(match_id) for match_id in match_ids if int(match_id) not in rollup.match_ids]
+    if not missing:
+        return rollup
+
+    store = get_event_store()
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_LOADS, len(missing))) as executor:
+        futures = {executor.submit(contextvars.copy_context().run,
+                                   load_player_stats, match_id, season, store): match_id
+                   for match_id in missing}
+        for future in as_completed(futures):
+            rollup.add(futures[future], future.result())
+    return rollup
+
+
+def scale_stats(stats: pd.DataFrame, scale: str, reference=None) -> pd.DataFrame:
+    '''
+    Aplica a escala escolhida às métricas do radar
+
+    Args:
+        stats (pd.DataFrame): Estatísticas indexadas por (team, player)
+        scale (str): Uma das escalas de RADAR_SCALES
+        reference (pd.DataFrame): Distribuição usada nos percentis; a própria tabela quando omitida
+
+    Returns:
+        stats (pd.DataFrame): Métricas do radar na escala escolhida
+    '''
+    if scale == 'Por 90 minutos':
+        stats = warehouse.per_90(stats)
+    elif scale == 'Percentil':
+        stats = warehouse.percentiles(stats, reference)
+    return stats[list(RADAR_METRICS)]
+
+
+def plot_radar(players: dict, scale: str):
+    '''
+    Monta o gráfico de radar com as métricas de cada jogador
+
+    Args:
+        players (dict): Nome do jogador -> pd.Series com as métricas do radar
+        scale (str): Escala das métricas, usada para definir o eixo radial
+
+    Returns:
+        fig (go.Figure): Gráfico de radar
+    '''
+    categories = list(RADAR_METRICS.values())
+    fig = go.Figure()
+
+    for player, values in players.items():
+        fig.add_trace(go.Scatterpolar(
+            r=values.tolist(),
+            theta=categories,
+            fill='toself',
+            name=player
+        ))
+
+    if scale == 'Percentil':
+        radial_range = [0, 100]
+    else:
+        highest = max((values.max() for values in players.values()), default=0)
+        radial_range = [0, max(float(highest) * 1.1, 1)]
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=radial_range
+            )),
+        showlegend=True
+    )
+    return fig
+
+
+@instrumentation.timed
 def display_comparison_chart(selected_match):
     '''
     Exibe um gráfico de comparação entre dois jogadores selecionados na tela do Streamlit
@@ -379,146 +1546,245 @@ def display_comparison_chart(selected_match):
     home_team = selected_match['home_team'].values[0]
     away_team = selected_match['away_team'].values[0]
 
-    events = sb.events(match_id=selected_match['match_id'].values[0])
-    home_team_events = events[events['team'] == home_team]
-    away_team_events = events[events['team'] == away_team]
+    with st.spinner('Carregando estatísticas da partida...'):
+        stats = load_player_stats(selected_match['match_id'].values[0])
 
-    home_team_players = home_team_events['player'].unique()
-    home_team_players = home_team_players[~pd.isna(home_team_players)]
-    away_team_players = away_team_events['player'].unique()
-    away_team_players = away_team_players[~pd.isna(away_team_players)]
+    home_team_players = stats.loc[home_team].index
+    away_team_players = stats.loc[away_team].index
 
     selected_home_player = st.selectbox(
         'Selecione jogador do time da casa', home_team_players, key='home_player_selectbox', index=0)
     selected_away_player = st.selectbox(
         'Selecione jogador do time visitante', away_team_players, key='away_player_selectbox', index=0)
+    scale = st.radio('Escala', RADAR_SCALES, key='radar_scale_radio', horizontal=True)
 
-    home_player_events = home_team_events[home_team_events['player']
-                                          == selected_home_player]
-    away_player_events = away_team_events[away_team_events['player']
-                                          == selected_away_player]
+    reference = None
+    if scale == 'Percentil':
+        # O desempenho na partida é comparado com o de cada jogador em cada partida da temporada
+        season = selected_match['season'].values[0]
+        with st.spinner('Carregando estatísticas da temporada...'):
+            reference = load_season_rollup(season, load_catalogue().by_season[season]).match_rows
 
-    home_player_completed_dribbles = home_player_events[(home_player_events['type'] == 'Dribble') & (
-        home_player_events['dribble_outcome'] == 'Complete')]
-    away_player_completed_dribbles = away_player_events[(away_player_events['type'] == 'Dribble') & (
-        away_player_events['dribble_outcome'] == 'Complete')]
+    scaled = scale_stats(stats, scale, reference)
+    fig = plot_radar({
+        selected_home_player: scaled.loc[(home_team, selected_home_player)],
+        selected_away_player: scaled.loc[(away_team, selected_away_player)],
+    }, scale)
 
-    home_player_completed_dribbles_count = home_player_completed_dribbles.shape[0]
-    away_player_completed_dribbles_count = away_player_completed_dribbles.shape[0]
+    st.plotly_chart(fig)
 
-    home_player_non_penalty_goals = home_player_events[(home_player_events['type'] == 'Shot') & (
-        home_player_events['shot_outcome'] == 'Goal') & (home_player_events['shot_type'] != 'Penalty')]
-    away_player_non_penalty_goals = away_player_events[(away_player_events['type'] == 'Shot') & (
-        away_player_events['shot_outcome'] == 'Goal') & (away_player_events['shot_type'] != 'Penalty')]
 
-    home_player_non_penalty_goals_count = home_player_non_penalty_goals.shape[0]
-    away_player_non_penalty_goals_count = away_player_non_penalty_goals.shape[0]
+LEADERBOARD_COLUMNS = {
+    'matches': 'Jogos',
+    'minutes': 'Minutos',
+    'goals': 'Gols',
+    'shots': 'Chutes',
+    'completed_passes': 'Passes Completos',
+    'completed_dribbles': 'Dribles Completados',
+    'ball_recoveries': 'Recuperações de Bola',
+    'tackles': 'Desarmes',
+    'blocks': 'Bloqueios',
+}
 
-    home_player_ball_recoveries = home_player_events[home_player_events['type']
-                                                     == 'Ball Recovery']
-    away_player_ball_recoveries = away_player_events[away_player_events['type']
-                                                     == 'Ball Recovery']
+TOURNAMENT_VIEWS = ['Mapa de Passe', 'Mapa de Chute', 'Radar']
 
-    home_player_ball_recoveries_count = home_player_ball_recoveries.shape[0]
-    away_player_ball_recoveries_count = away_player_ball_recoveries.shape[0]
 
-    home_player_tackles = home_player_events[(home_player_events['type'] == 'Duel') &
-                                             (home_player_events['duel_type'] == 'Tackle') &
-                                             (home_player_events['duel_outcome'] == 'Won')]
-
-    away_player_tackles = away_player_events[(away_player_events['type'] == 'Duel') &
-                                             (away_player_events['duel_type'] == 'Tackle') &
-                                             (away_player_events['duel_outcome'] == 'Won')]
+def display_leaderboard(stats: pd.DataFrame, team: str, container):
+    '''
+    Exibe a tabela de estatísticas acumuladas dos jogadores de um time
 
-    home_player_tackles_count = home_player_tackles.shape[0]
-    away_player_tackles_count = away_player_tackles.shape[0]
+    Args:
+        stats (pd.DataFrame): Estatísticas acumuladas indexadas por (team, player)
+        team (str): Nome do time
+        container: Elemento do Streamlit onde a tabela é exibida
+    '''
+    table = stats.loc[team, list(LEADERBOARD_COLUMNS)].rename(columns=LEADERBOARD_COLUMNS)
+    table['Minutos'] = table['Minutos'].round().astype(int)
+    container.dataframe(table.sort_values(['Gols', 'Minutos'], ascending=False))
 
-    home_player_blocks = home_player_events[(
-        home_player_events['type'] == 'Block')]
-    away_player_blocks = away_player_events[(
-        away_player_events['type'] == 'Block')]
 
-    home_player_blocks_count = home_player_blocks.shape[0]
-    away_player_blocks_count = away_player_blocks.shape[0]
+@instrumentation.timed
+def display_tournament(season, season_matches: pd.DataFrame, interactive=False):
+    '''
+    Exibe as visualizações de um jogador somando todas as partidas do seu time
+    na temporada. As partidas são carregadas em paralelo e a tabela de
+    estatísticas é atualizada à medida que cada uma fica pronta.
 
-    categories = ['Dribles Completados', 'Gols (exceto pênaltis)', 'Recuperações de Bola',
-                  'Desarmes', 'Bloqueios']
+    Args:
+        season (str): Temporada selecionada
+        season_matches (pd.DataFrame): DataFrame com as partidas da temporada
+        interactive (bool): Se os mapas são desenhados no navegador com WebGL em vez de PNG
+    '''
+    st.write(f'## Torneio {season}')
+    st.write('Selecione um time para acumular as estatísticas de todas as suas partidas')
+
+    teams = sorted(set(season_matches['home_team']) | set(season_matches['away_team']))
+    selected_team = st.selectbox('Selecione time', teams, key='tournament_team_selectbox')
+
+    team_matches = season_matches[(season_matches['home_team'] == selected_team) |
+                                  (season_matches['away_team'] == selected_team)]
+    match_ids = team_matches['match_id'].tolist()
+
+    progress = st.progress(0.0, text='Carregando partidas...')
+    leaderboard = st.empty()
+    rollup = get_season_rollup(season)
+    team_events = []
+
+    for done, (match_id, events, stats) in enumerate(iter_season_data(match_ids, season), 1):
+        team_events.append(events[events['team'] == selected_team])
+        rollup.add(match_id, stats)
+        progress.progress(done / len(match_ids),
+                          text=f'{done} de {len(match_ids)} partidas carregadas')
+        display_leaderboard(rollup.totals, selected_team, leaderboard)
+
+    progress.empty()
+    if not match_ids:
+        st.write('Nenhuma partida encontrada para o time')
+        return
+
+    # As linhas do time já somam todas as partidas dele
+    stats = rollup.totals
+    players = stats.loc[selected_team].index
+    selected_player = st.selectbox(
+        'Selecione jogador', players, key='tournament_player_selectbox', index=0)
+    view = st.radio('Visualização', TOURNAMENT_VIEWS,
+                    key='tournament_view_radio', horizontal=True)
+
+    def player_events(event_type):
+        return pd.concat([events[(events['player'] == selected_player) &
+                                 (events['type'] == event_type)]
+                          for events in team_events], ignore_index=True)
+
+    if view == 'Mapa de Passe' and interactive:
+        display_interactive_map(plot_pass_map_interactive, player_events('Pass'),
+                                key='tournament_pass_map')
+    elif view == 'Mapa de Chute' and interactive:
+        display_interactive_map(plot_shot_map_interactive, player_events('Shot'),
+                                key='tournament_shot_map')
+    elif view == 'Mapa de Passe':
+        png = render_figure(
+            ('tournament_pass_map', season, selected_team, selected_player),
+            plot_pass_map, load=lambda: player_events('Pass'))
+        st.image(png, use_column_width=True, output_format='PNG')
+    elif view == 'Mapa de Chute':
+        png = render_figure(
+            ('tournament_shot_map', season, selected_team, selected_player),
+            plot_shot_map, load=lambda: player_events('Shot'))
+        st.image(png, use_column_width=True, output_format='PNG')
+    else:
+        scale = st.radio('Escala', RADAR_SCALES, key='tournament_scale_radio', horizontal=True)
+        if scale == 'Percentil':
+            # Percentis entre todos os jogadores do torneio, não só os dos jogos do time
+            with st.spinner('Carregando estatísticas da temporada...'):
+                stats = load_season_rollup(season, season_matches['match_id']).totals
+        scaled = scale_stats(stats, scale)
+        st.plotly_chart(plot_radar(
+            {selected_player: scaled.loc[(selected_team, selected_player)]}, scale))
+
+    display_export({
+        'Eventos do jogador no torneio': (
+            f'{selected_player}_{season}',
+            lambda: pd.concat([events[events['player'] == selected_player]
+                               for events in team_events], ignore_index=True)),
+        'Eventos do time no torneio': (
+            f'{selected_team}_{season}', lambda: pd.concat(team_events, ignore_index=True)),
+    }, key='tournament')
+
+
+MATCH_VIEWS = ['Informações Gerais', 'Mapa de Passe', 'Mapa de Chute', 'Comparação de Jogadores']
+
+
+def display_debug_panel(run: instrumentation.Run):
+    '''
+    Exibe na barra lateral as medições da execução atual e os totais do processo
 
-    with st.spinner('Carregando gráfico de comparação...'):
-        time.sleep(5)
-        fig = go.Figure()
+    Args:
+        run (instrumentation.Run): Execução que acabou de terminar
+    '''
+    with st.sidebar.expander('Desempenho', expanded=True):
+        col1, col2 = st.columns(2)
+        col1.metric('Execução', f'{run.seconds * 1000:.0f} ms')
+        col2.metric('Pico de memória', f'{run.peak_rss / 1024 ** 2:.0f} MB')
+
+        stages = pd.DataFrame(run.stages, columns=['Etapa', 'Segundos'])
+        st.dataframe(stages.groupby('Etapa', sort=False)['Segundos'].agg(['count', 'sum']),
+                     use_container_width=True)
+        if run.counters:
+            st.dataframe(pd.Series(run.counters, name='Total').sort_index(),
+                         use_container_width=True)
+
+        st.download_button('Execuções (JSON Lines)', instrumentation.registry.to_jsonl(),
+                           file_name='metrics.jsonl', mime='application/x-ndjson',
+                           key='debug_jsonl_button')
+        st.download_button('Totais (Prometheus)', instrumentation.registry.to_prometheus(),
+                           file_name='metrics.prom', mime='text/plain',
+                           key='debug_prometheus_button')
+
+        if run.profile:
+            st.text(run.profile)
+
+
+def run_app():
+    '''
+    Executa o app registrando as medições da execução. Com ?debug=1 na URL o painel
+    de desempenho é exibido, e com ?profile=1 (cProfile) ou ?profile=pyinstrument a
+    execução é perfilada.
+    '''
+    profile = st.query_params.get('profile')
+    if profile in (None, '', '0'):
+        profile = None
+    elif profile != 'pyinstrument':
+        profile = 'cprofile'
 
-        fig.add_trace(go.Scatterpolar(
-            r=[home_player_completed_dribbles_count, home_player_non_penalty_goals_count,
-                home_player_ball_recoveries_count, home_player_tackles_count, home_player_blocks_count],
-            theta=categories,
-            fill='toself',
-            name=selected_home_player
-        ))
-        fig.add_trace(go.Scatterpolar(
-            r=[away_player_completed_dribbles_count, away_player_non_penalty_goals_count,
-                away_player_ball_recoveries_count, away_player_tackles_count, away_player_blocks_count],
-            theta=categories,
-            fill='toself',
-            name=selected_away_player
-        ))
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 5]
-                )),
-            showlegend=True
-        )
+    with instrumentation.record('main', profile=profile) as run:
+        main()
 
-        st.plotly_chart(fig)
+    if st.query_params.get('debug') == '1' or profile:
+        display_debug_panel(run)
 
 
 def main():
-    matches = load_data()
+    catalogue = load_catalogue()
 
     st.title('Partidas de Copa do Mundo :soccer:')
     st.write('Selecione uma temporada e uma partida para visualizar as informações')
 
-    seasons = matches['season'].unique()
     selected_season = st.sidebar.selectbox(
-        'Selecione temporada', seasons, key='season_selectbox')
-    filtered_matches = matches[matches['season'] == selected_season]
-
-    match_dict = {
-        row['match_id']: f"{row['home_team']} x {row['away_team']}"
-        for _, row in filtered_matches.iterrows()
-    }
-
-    selected_match_str = st.sidebar.selectbox(
-        'Selecione partida', list(match_dict.values()), key='match_selectbox')
-    reverse_match_dict = {v: k for k, v in match_dict.items()}
-    selected_match_id = reverse_match_dict[selected_match_str]
-    selected_match = filtered_matches[filtered_matches['match_id']
-                                      == selected_match_id]
-
-    tab1, tab2, tab3, tab4 = st.tabs(
-        ["Informações Gerais", "Mapa de Passe", "Mapa de Chute", "Comparação de Jogadores"])
+        'Selecione temporada', catalogue.seasons, key='season_selectbox')
+
+    mode = st.sidebar.radio('Modo de análise', ['Partida', 'Torneio'],
+                            key='mode_radio', horizontal=True)
+    interactive = st.sidebar.radio('Mapas', MAP_RENDERERS, key='map_renderer_radio',
+                                   horizontal=True) == MAP_RENDERERS[1]
+    if mode == 'Torneio':
+        display_tournament(selected_season, catalogue.season_matches[selected_season],
+                           interactive)
+        return
+
+    selected_match_id = st.sidebar.selectbox(
+        'Selecione partida', catalogue.by_season[selected_season],
+        format_func=catalogue.labels.__getitem__, key='match_selectbox')
+    selected_match = catalogue.match(selected_match_id)
+    get_prefetcher().schedule(catalogue.by_season[selected_season], selected_season,
+                              selected_match_id)
+
+    # Só a visualização escolhida é executada; com st.tabs todas rodariam a cada execução
+    view = st.radio('Visualização', MATCH_VIEWS, key='match_view_radio',
+                    horizontal=True, label_visibility='collapsed')
+    home_team = selected_match['home_team'].values[0]
+    away_team = selected_match['away_team'].values[0]
 
-    with tab1:
+    if view == 'Informações Gerais':
         display_match_info(selected_match)
         display_formations(selected_match)
-        lineups = sb.lineups(match_id=selected_match_id)
         display_events_dataframe(selected_match_id)
-
-    with tab2:
-        home_team = selected_match['home_team'].values[0]
-        away_team = selected_match['away_team'].values[0]
-        display_pass_map(selected_match_id, home_team, away_team)
-
-    with tab3:
-        home_team = selected_match['home_team'].values[0]
-        away_team = selected_match['away_team'].values[0]
-        display_shot_map(selected_match_id, home_team, away_team)
-
-    with tab4:
+    elif view == 'Mapa de Passe':
+        display_pass_map(selected_match_id, home_team, away_team, interactive)
+    elif view == 'Mapa de Chute':
+        display_shot_map(selected_match_id, home_team, away_team, interactive)
+    else:
         display_comparison_chart(selected_match)
 
 
 if __name__ == "__main__":
-    main()
+    run_app()
@@ -0,0 +1,326 @@
+'''
+Cache compartilhado entre processos para os dados do app.
+
+Cada réplica do Streamlit mantém seus próprios caches em memória. Este módulo
+oferece um segundo nível, fora do processo, onde o catálogo de partidas, as
+tabelas de cada partida, as estatísticas e as figuras renderizadas são gravados
+uma vez e lidos por todas as réplicas:
+
+    none    não compartilha nada (padrão)
+    sqlite  banco SQLite local, compartilhado pelos processos da mesma máquina
+    arrow   arquivos Arrow IPC lidos por memory map, direto das páginas do
+            cache do sistema operacional; a conversão para pandas ainda copia
+            as colunas para a memória de cada processo
+    redis   qualquer servidor compatível com Redis (requer o pacote redis)
+
+Variáveis de ambiente:
+    CACHE_BACKEND: um dos nomes acima
+    CACHE_DIR: diretório dos backends sqlite e arrow (padrão: data/cache)
+    REDIS_URL: URL do servidor Redis (padrão: redis://localhost:6379/0)
+'''
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import data_source
+import instrumentation
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'none')
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(data_source.BASE_DIR, 'data', 'cache'))
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+# Prefixo das chaves; alterar quando o formato dos dados gravados mudar
+NAMESPACE = 'v1'
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def frame_to_ipc(frame: pd.DataFrame) -> bytes:
+    '''
+    Serializa um DataFrame no formato Arrow IPC, preservando índice e categorias
+
+    Args:
+        frame (pd.DataFrame): DataFrame a ser serializado
+
+    Returns:
+        content (bytes): Arquivo Arrow IPC
+    '''
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def frame_from_ipc(source) -> pd.DataFrame:
+    '''
+    Lê um DataFrame de um arquivo Arrow IPC
+
+    Args:
+        source (bytes | pa.Buffer | pa.MemoryMappedFile): Conteúdo ou arquivo mapeado
+
+    Returns:
+        frame (pd.DataFrame): DataFrame lido
+    '''
+    if isinstance(source, bytes):
+        source = pa.py_buffer(source)
+    return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+class CacheBackend:
+    '''
+    Interface dos backends: valores em bytes associados a chaves de texto, com
+    expiração opcional. DataFrames são gravados em Arrow IPC.
+    '''
+    name = 'none'
+
+    def get(self, key: str):
+        '''
+        Retorna o valor da chave, ou None se ele não existe ou expirou
+        '''
+        return None
+
+    def set(self, key: str, value: bytes, ttl=None):
+        '''
+        Grava o valor da chave, expirando após `ttl` segundos quando informado
+        '''
+
+    def get_frame(self, key: str):
+        '''
+        Retorna o DataFrame gravado na chave, ou None
+        '''
+        content = self.get(key)
+        return None if content is None else frame_from_ipc(content)
+
+    def set_frame(self, key: str, frame: pd.DataFrame, ttl=None):
+        '''
+        Grava um DataFrame na chave
+        '''
+        self.set(key, frame_to_ipc(frame), ttl)
+
+
+class SQLiteBackend(CacheBackend):
+    '''
+    Cache em um banco SQLite local, compartilhado pelos processos da máquina
+
+    Args:
+        path (str): Caminho do arquivo do banco
+    '''
+    name = 'sqlite'
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS cache '
+                               '(key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexões SQLite não podem ser usadas por mais de uma thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                               (key, value, expires_at))
+
+
+class ArrowBackend(CacheBackend):
+    '''
+    Cache em arquivos de um diretório local. DataFrames são gravados em Arrow IPC
+    e lidos por memory map, sem ler o arquivo para um buffer antes da conversão.
+    O DataFrame resultante é uma cópia na memória do processo.
+
+    Args:
+        directory (str): Diretório dos arquivos
+    '''
+    name = 'arrow'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory,
+                            hashlib.sha1(key.encode()).hexdigest() + extension)
+
+    def _read_path(self, key, extension):
+        path = self._path(key, extension)
+        try:
+            expires_at = os.path.getmtime(path)
+        except OSError:
+            return None
+        # O mtime guarda o instante de expiração, ou 0 quando o valor não expira
+        if expires_at and expires_at < time.time():
+            return None
+        return path
+
+    def _write(self, path, content, ttl):
+        # Um arquivo temporário por escritor: vários processos podem gravar a mesma chave
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            expires_at = time.time() + ttl if ttl else 0
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, key):
+        path = self._read_path(key, '.bin')
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def set(self, key, value, ttl=None):
+        self._write(self._path(key, '.bin'), value, ttl)
+
+    def get_frame(self, key):
+        path = self._read_path(key, '.arrow')
+        if path is None:
+            return None
+        return frame_from_ipc(pa.memory_map(path))
+
+    def set_frame(self, key, frame, ttl=None):
+        self._write(self._path(key, '.arrow'), frame_to_ipc(frame), ttl)
+
+
+class RedisBackend(CacheBackend):
+    '''
+    Cache em um servidor compatível com Redis
+
+    Args:
+        client: Cliente com os métodos `get(key)` e `set(key, value, ex=None)`,
+            como `redis.Redis`
+    '''
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+
+class NamespacedBackend:
+    '''
+    Acrescenta o prefixo NAMESPACE às chaves e registra acertos e falhas na instrumentação
+
+    Args:
+        backend (CacheBackend): Backend que guarda os valores
+    '''
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.enabled = type(backend) is not CacheBackend
+
+    def _call(self, method, key, *args):
+        # Sem backend, nada é serializado
+        if not self.enabled:
+            return None
+        value = getattr(self.backend, method)(f'{NAMESPACE}:{key}', *args)
+        if method.startswith('get'):
+            instrumentation.count('shared_cache_hit' if value is not None else 'shared_cache_miss')
+        return value
+
+    def get(self, key):
+        return self._call('get', key)
+
+    def set(self, key, value, ttl=None):
+        return self._call('set', key, value, ttl)
+
+    def get_frame(self, key):
+        return self._call('get_frame', key)
+
+    def set_frame(self, key, frame, ttl=None):
+        return self._call('set_frame', key, frame, ttl)
+
+    def get_or_load_frame(self, key, loader, ttl=None) -> pd.DataFrame:
+        '''
+        Retorna o DataFrame da chave, carregando-o com `loader` e gravando-o
+        quando ainda não está no cache
+
+        Args:
+            key (str): Chave do DataFrame
+            loader (callable): Função sem argumentos que carrega o DataFrame
+            ttl (int): Segundos até o valor gravado expirar
+
+        Returns:
+            frame (pd.DataFrame): DataFrame da chave
+        '''
+        frame = self.get_frame(key)
+        if frame is None:
+            frame = loader()
+            self.set_frame(key, frame, ttl)
+        return frame
+
+
+def create_backend(name=CACHE_BACKEND) -> NamespacedBackend:
+    '''
+    Cria o backend de cache escolhido
+
+    Args:
+        name (str): 'none', 'sqlite', 'arrow' ou 'redis'
+
+    Returns:
+        backend (NamespacedBackend): Backend pronto para uso
+    '''
+    if name == 'none':
+        backend = CacheBackend()
+    elif name == 'sqlite':
+        backend = SQLiteBackend(os.path.join(CACHE_DIR, 'cache.sqlite'))
+    elif name == 'arrow':
+        backend = ArrowBackend(CACHE_DIR)
+    elif name == 'redis':
+        if redis is None:
+            raise ImportError('CACHE_BACKEND=redis requer o pacote redis')
+        backend = RedisBackend(redis.Redis.from_url(REDIS_URL))
+    else:
+        raise ValueError(f'CACHE_BACKEND desconhecido: {name}')
+    return NamespacedBackend(backend)
+
+
+def get_backend() -> NamespacedBackend:
+    '''
+    Retorna o backend de cache do processo, criando-o no primeiro uso
+
+    Returns:
+        backend (NamespacedBackend): Backend escolhido por CACHE_BACKEND
+    '''
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+    return _backend
@@ -0,0 +1,395 @@
+'''
+Camada de acesso aos dados abertos da StatsBomb.
+
+Os arquivos JSON do repositório open-data são lidos de um espelho local quando
+disponível e, caso contrário, baixados do GitHub. O espelho guarda cada arquivo
+compactado em gzip e um manifest.json com o sha256 de cada um, verificado a cada
+leitura. Para criar ou atualizar o espelho das partidas da Copa do Mundo:
+
+    python data_source.py sync --dest data/statsbomb
+
+Variáveis de ambiente:
+    STATSBOMB_DATA_DIR: diretório do espelho local (padrão: data/statsbomb)
+    STATSBOMB_OFFLINE: se "1", nunca acessa a rede; arquivos ausentes geram erro
+    STATSBOMB_OPEN_DATA_URL: URL de onde os arquivos são baixados (padrão: GitHub da StatsBomb)
+    HTTP_CACHE_DIR: diretório local do cache HTTP (padrão: data/http_cache)
+    HTTP_CACHE_EXPIRE: segundos até uma resposta ser revalidada (padrão: 3600)
+    HTTP_POOL_SIZE: conexões mantidas abertas por host (padrão: 16)
+    HTTP_CONNECT_TIMEOUT: segundos para abrir uma conexão (padrão: 5)
+    HTTP_READ_TIMEOUT: segundos de espera por dados da resposta (padrão: 30)
+
+Os downloads passam por uma sessão HTTP única por processo, com conexões
+reaproveitadas e um cache em disco (SQLite) que revalida as respostas vencidas
+pelo ETag. Processos da mesma máquina que apontam HTTP_CACHE_DIR para o mesmo
+diretório compartilham o cache e não baixam novamente o que outro já baixou.
+O banco usa o modo WAL do SQLite, que não funciona em sistemas de arquivos de
+rede: réplicas em máquinas diferentes devem ter cada uma o seu HTTP_CACHE_DIR
+em disco local e compartilhar os dados pelo cache_backends (CACHE_BACKEND=redis).
+
+O diretório fixtures/statsbomb contém um espelho pequeno com dados sintéticos,
+suficiente para rodar o app sem rede:
+
+    STATSBOMB_DATA_DIR=fixtures/statsbomb STATSBOMB_OFFLINE=1 streamlit run app.py
+'''
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from statsbombpy import public
+
+import instrumentation
+
+OPEN_DATA_URL = 'https://raw.githubusercontent.com/statsbomb/open-data/master/data/'
+DOWNLOAD_URL = os.environ.get('STATSBOMB_OPEN_DATA_URL', OPEN_DATA_URL)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get('STATSBOMB_DATA_DIR',
+                          os.path.join(BASE_DIR, 'data', 'statsbomb'))
+OFFLINE = os.environ.get('STATSBOMB_OFFLINE') == '1'
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', os.path.join(BASE_DIR, 'data', 'http_cache'))
+HTTP_CACHE_EXPIRE = int(os.environ.get('HTTP_CACHE_EXPIRE', '3600'))
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '16'))
+HTTP_TIMEOUT = (float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5')),
+                float(os.environ.get('HTTP_READ_TIMEOUT', '30')))
+MANIFEST_FILE = 'manifest.json'
+WORLD_CUP = 'FIFA World Cup'
+
+logger = logging.getLogger(__name__)
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    '''
+    Adaptador HTTP que aplica um timeout às requisições que não informam um, para
+    que uma conexão travada não prenda a thread que fez a requisição
+
+    Args:
+        timeout (tuple): Segundos para conectar e para esperar dados da resposta
+    '''
+
+    def __init__(self, timeout=HTTP_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout,
+                            **kwargs)
+
+
+def create_session(cache_dir=HTTP_CACHE_DIR, expire_after=HTTP_CACHE_EXPIRE,
+                   pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT) -> requests_cache.CachedSession:
+    '''
+    Cria uma sessão HTTP com cache em disco e conexões persistentes
+
+    Args:
+        cache_dir (str): Diretório do banco SQLite do cache
+        expire_after (int): Segundos até uma resposta precisar ser revalidada
+        pool_size (int): Conexões mantidas abertas por host
+        timeout (tuple): Segundos para conectar e para esperar dados da resposta
+
+    Returns:
+        session (requests_cache.CachedSession): Sessão com cache
+    '''
+    os.makedirs(cache_dir, exist_ok=True)
+    session = requests_cache.CachedSession(
+        os.path.join(cache_dir, 'http_cache'),
+        backend='sqlite',
+        wal=True,
+        expire_after=expire_after,
+        # Respostas vencidas são revalidadas com If-None-Match e, se a rede
+        # falhar, a cópia em cache é usada
+        stale_if_error=True,
+        allowable_codes=(200,),
+    )
+    adapter = TimeoutHTTPAdapter(timeout, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests_cache.CachedSession:
+    '''
+    Retorna a sessão HTTP compartilhada pelo processo, criando-a no primeiro uso
+
+    Returns:
+        session (requests_cache.CachedSession): Sessão com cache
+    '''
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+    return _session
+
+
+def load_manifest(data_dir=DATA_DIR) -> dict:
+    '''
+    Lê o manifest do espelho local, relendo o arquivo apenas quando ele é alterado
+
+    Args:
+        data_dir (str): Diretório do espelho local
+
+    Returns:
+        manifest (dict): Caminho relativo de cada arquivo -> {'sha256', 'bytes'}
+    '''
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    with _manifests_lock:
+        cached = _manifests.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'rb') as f:
+                cached = (mtime, orjson.loads(f.read()))
+            _manifests[path] = cached
+    return cached[1]
+
+
+def read_local(relpath, data_dir=DATA_DIR):
+    '''
+    Lê um arquivo do espelho local, validando seu checksum
+
+    Args:
+        relpath (str): Caminho relativo ao diretório data/ do open-data, ex.: 'events/123.json'
+        data_dir (str): Diretório do espelho local
+
+    Returns:
+        content (bytes | None): Conteúdo JSON descompactado, ou None se o arquivo
+            não existe no espelho ou está corrompido
+    '''
+    entry = load_manifest(data_dir).get(relpath)
+    if entry is None:
+        return None
+
+    try:
+        with open(os.path.join(data_dir, relpath + '.gz'), 'rb') as f:
+            raw = f.read()
+    except OSError:
+        return None
+
+    if hashlib.sha256(raw).hexdigest() != entry['sha256']:
+        logger.warning('Checksum inválido para %s no espelho local', relpath)
+        return None
+
+    instrumentation.count('bytes_local', len(raw))
+    return gzip.decompress(raw)
+
+
+def fetch_remote(relpath, session=None, refresh=False) -> bytes:
+    '''
+    Baixa um arquivo do repositório open-data da StatsBomb pelo cache HTTP. Se o
+    download falhar e houver uma cópia em cache, mesmo vencida, ela é usada.
+
+    Args:
+        relpath (str): Caminho relativo ao diretório data/ do open-data
+        session (requests_cache.CachedSession): Sessão HTTP; a do processo quando omitida
+        refresh (bool): Se a cópia em cache deve ser revalidada mesmo que não tenha vencido
+
+    Returns:
+        content (bytes): Conteúdo JSON do arquivo
+    '''
+    session = session or get_session()
+    url = DOWNLOAD_URL + relpath
+    try:
+        response = session.get(url, refresh=refresh)
+        response.raise_for_status()
+    except requests.RequestException:
+        # Respostas com ETag vencidas são revalidadas por uma requisição
+        # condicional, e nesse caminho o requests-cache não aplica o
+        # stale_if_error; a cópia em cache é buscada aqui
+        response = session.get(url, only_if_cached=True)
+        if response.status_code != 200:
+            raise
+        logger.warning('Falha ao baixar %s; usando a cópia em cache', relpath)
+        instrumentation.count('http_stale')
+    if getattr(response, 'from_cache', False):
+        instrumentation.count('http_cache_hit')
+    else:
+        instrumentation.count('http_requests')
+        instrumentation.count('bytes_remote', len(response.content))
+    return response.content
+
+
+def get_json(relpath):
+    '''
+    Carrega um arquivo JSON do open-data, preferindo o espelho local
+
+    Args:
+        relpath (str): Caminho relativo ao diretório data/ do open-data
+
+    Returns:
+        data (list | dict): JSON decodificado
+    '''
+    content = read_local(relpath)
+    if content is None:
+        if OFFLINE:
+            raise FileNotFoundError(
+                f'{relpath} não está no espelho local {DATA_DIR}')
+        content = fetch_remote(relpath)
+    return orjson.loads(content)
+
+
+def fetch_json(url):
+    '''
+    Substituto de `statsbombpy.public.get_response` que lê pelo espelho local
+
+    Args:
+        url (str): URL de um arquivo do open-data
+
+    Returns:
+        data (list | dict): JSON decodificado
+    '''
+    if not url.startswith(OPEN_DATA_URL):
+        raise ValueError(f'URL fora do open-data da StatsBomb: {url}')
+    return get_json(url[len(OPEN_DATA_URL):])
+
+
+def install():
+    '''
+    Faz com que as funções `sb.competitions`, `sb.matches`, `sb.events` e
+    `sb.lineups` do statsbombpy leiam os dados por esta camada
+    '''
+    public.get_response = fetch_json
+
+
+def write_file(relpath, content, data_dir, manifest):
+    '''
+    Grava um arquivo JSON compactado no espelho local e registra seu checksum
+
+    Args:
+        relpath (str): Caminho relativo ao diretório data/ do open-data
+        content (bytes): Conteúdo JSON do arquivo
+        data_dir (str): Diretório do espelho local
+        manifest (dict): Manifest a ser atualizado com o checksum do arquivo
+    '''
+    raw = gzip.compress(content, mtime=0)
+    path = os.path.join(data_dir, relpath + '.gz')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(raw)
+    manifest[relpath] = {'sha256': hashlib.sha256(raw).hexdigest(),
+                         'bytes': len(content)}
+
+
+def save_manifest(data_dir, manifest):
+    '''
+    Grava o manifest do espelho local de forma atômica
+
+    Args:
+        data_dir (str): Diretório do espelho local
+        manifest (dict): Manifest com os checksums dos arquivos
+    '''
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def sync(data_dir=DATA_DIR, competition_name=WORLD_CUP, workers=8):
+    '''
+    Espelha localmente competições, partidas, eventos e escalações de uma competição.
+    Arquivos já presentes com checksum válido não são baixados novamente.
+
+    Args:
+        data_dir (str): Diretório do espelho local
+        competition_name (str): Nome da competição a ser espelhada
+        workers (int): Número de downloads simultâneos
+
+    Returns:
+        downloaded (int): Número de arquivos baixados
+    '''
+    os.makedirs(data_dir, exist_ok=True)
+    manifest = dict(load_manifest(data_dir))
+    lock = threading.Lock()
+    downloaded = 0
+
+    def mirror(relpath, refresh=False):
+        nonlocal downloaded
+        content = None if refresh else read_local(relpath, data_dir)
+        if content is None:
+            content = fetch_remote(relpath, refresh=refresh)
+            with lock:
+                write_file(relpath, content, data_dir, manifest)
+                downloaded += 1
+        return content
+
+    # Competições e partidas podem ganhar novas temporadas, então são sempre atualizadas
+    competitions = orjson.loads(mirror('competitions.json', refresh=True))
+    seasons = [(c['competition_id'], c['season_id']) for c in competitions
+               if c['competition_name'] == competition_name]
+
+    match_ids = []
+    for competition_id, season_id in seasons:
+        matches = orjson.loads(
+            mirror(f'matches/{competition_id}/{season_id}.json', refresh=True))
+        match_ids.extend(match['match_id'] for match in matches)
+        logger.info('Temporada %s: %d partidas', season_id, len(matches))
+
+    relpaths = [f'{kind}/{match_id}.json'
+                for match_id in match_ids for kind in ('events', 'lineups')]
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(mirror, relpaths))
+    finally:
+        save_manifest(data_dir, manifest)
+
+    return downloaded
+
+
+def verify(data_dir=DATA_DIR):
+    '''
+    Verifica o checksum de todos os arquivos do espelho local
+
+    Args:
+        data_dir (str): Diretório do espelho local
+
+    Returns:
+        invalid (list): Caminhos relativos dos arquivos ausentes ou corrompidos
+    '''
+    return [relpath for relpath in load_manifest(data_dir)
+            if read_local(relpath, data_dir) is None]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Espelho local dos dados abertos da StatsBomb')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser(
+        'sync', help='Baixa os dados da competição para o espelho local')
+    sync_parser.add_argument('--dest', default=DATA_DIR)
+    sync_parser.add_argument('--competition', default=WORLD_CUP)
+    sync_parser.add_argument('--workers', type=int, default=8)
+
+    verify_parser = subparsers.add_parser(
+        'verify', help='Verifica os checksums do espelho local')
+    verify_parser.add_argument('--dest', default=DATA_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'sync':
+        downloaded = sync(args.dest, args.competition, args.workers)
+        print(f'{downloaded} arquivos baixados para {args.dest}')
+    else:
+        invalid = verify(args.dest)
+        for relpath in invalid:
+            print(f'inválido: {relpath}')
+        raise SystemExit(1 if invalid else 0)
+
+
+if __name__ == '__main__':
+    main()
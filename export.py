@@ -0,0 +1,177 @@
+'''
+Exportação de eventos em CSV, Parquet ou JSON Lines.
+
+Os eventos são escritos em blocos de linhas diretamente no arquivo de destino,
+sem montar o conteúdo inteiro como uma única string. As coordenadas já vêm
+separadas em colunas pelo armazém, e as colunas aninhadas restantes (listas e
+dicionários) são gravadas como texto JSON no CSV e como JSON no JSON Lines.
+
+Também pode ser usado pela linha de comando, consultando o armazém:
+
+    python export.py saida.parquet --season 2022 --team Argentina --format parquet
+'''
+import argparse
+import io
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import warehouse
+
+CHUNK_ROWS = 5000
+# Arquivos maiores que isso são mantidos em disco em vez de em memória
+SPOOL_MAX_BYTES = 8 * 1024 ** 2
+
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'JSON Lines': ('jsonl', 'application/x-ndjson'),
+}
+
+
+def _to_json(value):
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is None:
+        return None
+    return json.dumps(value, ensure_ascii=False, default=lambda item: item.tolist())
+
+
+def _nested_columns(events: pd.DataFrame) -> list:
+    nested = []
+    for column in events.columns:
+        if events[column].dtype != object:
+            continue
+        values = events[column].dropna()
+        if len(values) and isinstance(values.iloc[0], (list, dict, np.ndarray)):
+            nested.append(column)
+    return nested
+
+
+def iter_chunks(events: pd.DataFrame, chunk_rows=CHUNK_ROWS, flatten=True):
+    '''
+    Divide os eventos em blocos de linhas, convertendo as colunas aninhadas em JSON
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        chunk_rows (int): Número de linhas por bloco
+        flatten (bool): Se as colunas aninhadas devem ser convertidas em JSON
+
+    Yields:
+        chunk (pd.DataFrame): Bloco de eventos
+    '''
+    nested = _nested_columns(events) if flatten else []
+    for start in range(0, len(events), chunk_rows):
+        chunk = events.iloc[start:start + chunk_rows]
+        if nested:
+            chunk = chunk.assign(**{column: chunk[column].map(_to_json) for column in nested})
+        yield chunk
+
+
+def write_csv(events: pd.DataFrame, f):
+    '''
+    Escreve os eventos em CSV, bloco a bloco
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        f: Arquivo binário de destino
+    '''
+    text = io.TextIOWrapper(f, encoding='utf-8', newline='', write_through=True)
+    for i, chunk in enumerate(iter_chunks(events)):
+        chunk.to_csv(text, header=i == 0, index=False)
+    text.detach()
+
+
+def write_jsonl(events: pd.DataFrame, f):
+    '''
+    Escreve os eventos em JSON Lines, bloco a bloco. As colunas aninhadas são
+    gravadas como listas e objetos JSON, não como texto.
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        f: Arquivo binário de destino
+    '''
+    for chunk in iter_chunks(events, flatten=False):
+        content = chunk.to_json(orient='records', lines=True, force_ascii=False)
+        f.write(content.encode('utf-8'))
+        if not content.endswith('\n'):
+            f.write(b'\n')
+
+
+def write_parquet(events: pd.DataFrame, f):
+    '''
+    Escreve os eventos em Parquet, um grupo de linhas por bloco
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        f: Arquivo binário de destino
+    '''
+    schema = pa.Schema.from_pandas(events, preserve_index=False)
+    with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+        for chunk in iter_chunks(events, flatten=False):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+WRITERS = {
+    'CSV': write_csv,
+    'Parquet': write_parquet,
+    'JSON Lines': write_jsonl,
+}
+
+
+def export(events: pd.DataFrame, fmt: str, f):
+    '''
+    Escreve os eventos no formato escolhido
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        fmt (str): Um dos formatos de FORMATS
+        f: Arquivo binário de destino
+    '''
+    WRITERS[fmt](events, f)
+
+
+def export_to_file(events: pd.DataFrame, fmt: str):
+    '''
+    Escreve os eventos em um arquivo temporário, mantido em memória enquanto for
+    pequeno e movido para o disco quando passa de SPOOL_MAX_BYTES
+
+    Args:
+        events (pd.DataFrame): Eventos a serem exportados
+        fmt (str): Um dos formatos de FORMATS
+
+    Returns:
+        f (tempfile.SpooledTemporaryFile): Arquivo posicionado no início
+    '''
+    f = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    export(events, fmt, f)
+    f.seek(0)
+    return f
+
+
+def main():
+    extensions = {extension: fmt for fmt, (extension, _) in FORMATS.items()}
+
+    parser = argparse.ArgumentParser(description='Exporta eventos do armazém')
+    parser.add_argument('output')
+    parser.add_argument('--season')
+    parser.add_argument('--match-id', type=int, action='append', dest='match_ids')
+    parser.add_argument('--team')
+    parser.add_argument('--player')
+    parser.add_argument('--type', action='append', dest='types')
+    parser.add_argument('--format', choices=list(extensions), default='csv')
+    args = parser.parse_args()
+
+    events = warehouse.query_events(season=args.season, match_ids=args.match_ids,
+                                    team=args.team, player=args.player, types=args.types)
+    with open(args.output, 'wb') as f:
+        export(events, extensions[args.format], f)
+    print(f'{len(events)} eventos exportados para {args.output}')
+
+
+if __name__ == '__main__':
+    main()
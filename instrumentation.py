@@ -0,0 +1,285 @@
+'''
+Instrumentação de desempenho do app.
+
+Cada execução do script do Streamlit é registrada como uma execução (Run) com o
+tempo de cada etapa, os acertos e falhas dos caches, os bytes lidos dos dados e
+o pico de memória do processo. Os totais de todas as execuções são acumulados
+no processo e podem ser exportados em JSON Lines ou no formato texto do Prometheus.
+
+A execução atual é guardada em uma ContextVar, então as etapas e contadores
+registrados em threads auxiliares só entram na execução quando a função é
+chamada com `contextvars.copy_context().run`.
+
+Variáveis de ambiente:
+    METRICS_LOG: arquivo JSON Lines onde cada execução é acrescentada ao terminar
+'''
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import psutil
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+METRICS_LOG = os.environ.get('METRICS_LOG')
+RECENT_RUNS = 100
+
+_current_run = contextvars.ContextVar('current_run', default=None)
+_current_stage = contextvars.ContextVar('current_stage', default='')
+_process = psutil.Process()
+
+
+def rss() -> int:
+    '''
+    Retorna a memória residente atual do processo em bytes
+    '''
+    return _process.memory_info().rss
+
+
+class Run:
+    '''
+    Medições de uma execução do script
+
+    Args:
+        name (str): Nome da execução, ex.: 'main'
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.stages = []
+        self.counters = Counter()
+        self.peak_rss = rss()
+        self.profile = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages.append((name, seconds))
+            self.peak_rss = max(self.peak_rss, rss())
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def to_dict(self) -> dict:
+        '''
+        Converte a execução em um dicionário serializável em JSON
+        '''
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'seconds': round(self.seconds, 6),
+            'peak_rss': self.peak_rss,
+            'stages': [{'stage': name, 'seconds': round(seconds, 6)}
+                       for name, seconds in self.stages],
+            'counters': dict(self.counters),
+        }
+
+
+class Registry:
+    '''
+    Totais acumulados de todas as execuções do processo e as execuções mais recentes
+    '''
+
+    def __init__(self):
+        self.runs = 0
+        self.run_seconds = 0.0
+        self.stage_seconds = Counter()
+        self.stage_calls = Counter()
+        self.counters = Counter()
+        self.recent = deque(maxlen=RECENT_RUNS)
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stage_seconds[name] += seconds
+            self.stage_calls[name] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def finish(self, run: Run):
+        with self._lock:
+            self.runs += 1
+            self.run_seconds += run.seconds
+            self.recent.append(run.to_dict())
+
+    def to_jsonl(self) -> str:
+        '''
+        Exporta as execuções mais recentes em JSON Lines
+
+        Returns:
+            content (str): Uma execução por linha
+        '''
+        with self._lock:
+            runs = list(self.recent)
+        return ''.join(json.dumps(run, ensure_ascii=False) + '\n' for run in runs)
+
+    def to_prometheus(self) -> str:
+        '''
+        Exporta os totais no formato texto do Prometheus
+
+        Returns:
+            content (str): Métricas no formato de exposição do Prometheus
+        '''
+        with self._lock:
+            lines = [
+                '# TYPE dashboard_runs_total counter',
+                f'dashboard_runs_total {self.runs}',
+                '# TYPE dashboard_run_seconds_total counter',
+                f'dashboard_run_seconds_total {self.run_seconds:.6f}',
+                '# TYPE dashboard_stage_seconds_total counter',
+            ]
+            lines += [f'dashboard_stage_seconds_total{{stage="{name}"}} {seconds:.6f}'
+                      for name, seconds in sorted(self.stage_seconds.items())]
+            lines.append('# TYPE dashboard_stage_calls_total counter')
+            lines += [f'dashboard_stage_calls_total{{stage="{name}"}} {calls}'
+                      for name, calls in sorted(self.stage_calls.items())]
+            lines.append('# TYPE dashboard_events_total counter')
+            lines += [f'dashboard_events_total{{name="{name}"}} {value}'
+                      for name, value in sorted(self.counters.items())]
+        lines += [
+            '# TYPE dashboard_resident_memory_bytes gauge',
+            f'dashboard_resident_memory_bytes {rss()}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def current_run():
+    '''
+    Retorna a execução em andamento no contexto atual, ou None
+    '''
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name):
+    '''
+    Mede o tempo de uma etapa. Etapas aninhadas são registradas com o caminho
+    completo, ex.: 'display_pass_map/render_figure'
+
+    Args:
+        name (str): Nome da etapa
+    '''
+    parent = _current_stage.get()
+    path = f'{parent}/{name}' if parent else name
+    token = _current_stage.set(path)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _current_stage.reset(token)
+        registry.add_stage(path, seconds)
+        run = _current_run.get()
+        if run is not None:
+            run.add_stage(path, seconds)
+
+
+def timed(func):
+    '''
+    Decorador que mede cada chamada da função como uma etapa com o nome dela
+    '''
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def count(name, n=1):
+    '''
+    Incrementa um contador na execução atual e nos totais do processo
+
+    Args:
+        name (str): Nome do contador, ex.: 'event_store_hit' ou 'bytes_remote'
+        n (int): Valor a ser somado
+    '''
+    registry.count(name, n)
+    run = _current_run.get()
+    if run is not None:
+        run.count(name, n)
+
+
+@contextmanager
+def profiler(kind):
+    '''
+    Perfila o bloco com o pyinstrument, se instalado e pedido, ou com o cProfile
+
+    Args:
+        kind (str): 'pyinstrument' ou qualquer outro valor para o cProfile
+
+    Yields:
+        report (list): Lista que recebe o relatório em texto ao fim do bloco
+    '''
+    report = []
+    if kind == 'pyinstrument' and pyinstrument is not None:
+        profile = pyinstrument.Profiler()
+        profile.start()
+        try:
+            yield report
+        finally:
+            profile.stop()
+            report.append(profile.output_text(unicode=True))
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield report
+    finally:
+        profile.disable()
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(40)
+        report.append(output.getvalue())
+
+
+@contextmanager
+def record(name, profile=None):
+    '''
+    Registra uma execução completa, opcionalmente perfilada
+
+    Args:
+        name (str): Nome da execução
+        profile (str): Perfilador a ser usado ('cprofile' ou 'pyinstrument'), ou None
+
+    Yields:
+        run (Run): Execução em andamento
+    '''
+    run = Run(name)
+    token = _current_run.set(run)
+    start = time.perf_counter()
+    try:
+        if profile:
+            with profiler(profile) as report:
+                yield run
+        else:
+            report = None
+            yield run
+    finally:
+        run.seconds = time.perf_counter() - start
+        run.peak_rss = max(run.peak_rss, rss())
+        if report:
+            run.profile = report[0]
+        _current_run.reset(token)
+        registry.finish(run)
+        if METRICS_LOG:
+            with open(METRICS_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(run.to_dict(), ensure_ascii=False) + '\n')
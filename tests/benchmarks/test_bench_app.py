@@ -0,0 +1,218 @@
+'''
+Benchmark dos caminhos mais usados do dashboard, sobre o espelho de fixtures.
+
+Mede o carregamento das partidas, a leitura das partidas pelo armazém, a
+filtragem da comparação de jogadores, o índice de eventos por tempo e posse, a
+página da tabela de eventos, os mapas de passes e chutes e a exportação em CSV.
+Também executa o app sem interface pelo AppTest do Streamlit e mede cada
+interação, com o tempo das etapas registrado pela instrumentação em extra_info.
+O pico de memória alocada de cada função também fica em extra_info.
+
+O ambiente vem de tests/conftest.py: nada é baixado, e o armazém e os caches
+ficam em um diretório temporário. Tempos absolutos só são comparáveis na mesma
+máquina, e o pytest-benchmark guarda cada execução em .benchmarks/ separada por
+máquina. Para comparar com outra revisão, meça as duas na mesma máquina:
+
+    git checkout main && pytest tests/benchmarks --benchmark-autosave
+    git checkout - && pytest tests/benchmarks --benchmark-compare --benchmark-compare-fail=min:50%
+
+Para rodar os testes sem os benchmarks: python -m pytest -q --benchmark-skip
+'''
+import os
+import shutil
+import tracemalloc
+
+import pytest
+import streamlit as st
+from matplotlib import pyplot as plt
+from streamlit.testing.v1 import AppTest
+
+import app
+import export
+import instrumentation
+import warehouse
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'app.py')
+ROUNDS = 5
+MATCH_ID = 3869685
+SEASON = '2022'
+
+# Etapas da instrumentação incluídas no extra_info de cada interação
+STAGES = ['display_formations', 'display_pass_map', 'display_shot_map',
+          'display_comparison_chart', 'display_events_dataframe', 'display_tournament']
+
+
+def peak_bytes(func, setup=None) -> int:
+    '''
+    Mede o pico de memória alocada em uma execução. O tracemalloc deixa a execução
+    mais lenta, então a memória é medida fora das rodadas cronometradas.
+
+    Args:
+        func (callable): Função medida
+        setup (callable): Função executada antes da medição
+
+    Returns:
+        peak (int): Pico de bytes alocados
+    '''
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(benchmark, func, setup=None, rounds=ROUNDS):
+    '''
+    Cronometra a função em várias rodadas e registra o pico de memória
+    '''
+    benchmark.extra_info['peak_bytes'] = peak_bytes(func, setup)
+    benchmark.pedantic(func, setup=setup, rounds=rounds, warmup_rounds=0 if setup else 1)
+
+
+def render(plot, events):
+    fig = plot(events)
+    fig.savefig(os.devnull, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+
+
+@pytest.fixture(scope='module')
+def events():
+    return warehouse.load_match_events(MATCH_ID, SEASON)
+
+
+@pytest.fixture(scope='module')
+def stats():
+    return warehouse.load_match_stats(MATCH_ID, SEASON)
+
+
+@pytest.fixture(scope='module')
+def index(events):
+    return warehouse.EventIndex(events)
+
+
+@pytest.fixture(scope='module')
+def home(stats):
+    return stats.index.get_level_values('team').unique()[0]
+
+
+def test_load_data_cold(benchmark):
+    run(benchmark, app.load_data, setup=app.load_data.clear)
+
+
+def test_load_data_warm(benchmark):
+    run(benchmark, app.load_data)
+
+
+def test_load_match_cold(benchmark):
+    def remove_match():
+        shutil.rmtree(warehouse.match_dir(SEASON, MATCH_ID), ignore_errors=True)
+
+    run(benchmark, lambda: warehouse.load_match(MATCH_ID, SEASON), setup=remove_match)
+
+
+def test_load_match_warm(benchmark):
+    run(benchmark, lambda: warehouse.load_match(MATCH_ID, SEASON))
+
+
+def test_comparison_filter(benchmark, stats):
+    home, away = stats.index.get_level_values('team').unique()[:2]
+    home_player = stats.loc[home].index[0]
+    away_player = stats.loc[away].index[0]
+
+    def comparison():
+        for scale in app.RADAR_SCALES:
+            scaled = app.scale_stats(stats, scale)
+            scaled.loc[(home, home_player)]
+            scaled.loc[(away, away_player)]
+
+    run(benchmark, comparison)
+
+
+def test_event_index_build(benchmark, events):
+    run(benchmark, lambda: warehouse.EventIndex(events))
+
+
+def test_event_index_window(benchmark, index, home):
+    run(benchmark, lambda: index.window(60, 75, types=['Pass'], team=home))
+
+
+def test_event_index_shot_chains(benchmark, events, index):
+    shots = events[events['type'] == 'Shot']
+    run(benchmark, lambda: index.shot_chains(shots))
+
+
+def test_events_page(benchmark, index):
+    columns = index.type_columns('Pass')
+    run(benchmark, lambda: app.events_page(
+        app.search_events(index.window(0, index.max_minute, types=['Pass']), columns, 'a'),
+        columns, sort_by='minute', ascending=False, page=2, page_size=50))
+
+
+def test_pass_map_team(benchmark, events, home):
+    passes = events[(events['team'] == home) & (events['type'] == 'Pass')]
+    run(benchmark, lambda: render(app.plot_pass_map, passes), rounds=3)
+
+
+def test_shot_map_match(benchmark, events):
+    shots = events[events['type'] == 'Shot']
+    run(benchmark, lambda: render(app.plot_shot_map, shots), rounds=3)
+
+
+def test_export_csv(benchmark, events):
+    run(benchmark, lambda: export.export_to_file(events, 'CSV').close())
+
+
+def select_other_match(at):
+    # Qualquer partida da temporada que não seja a já selecionada
+    selectbox = at.selectbox(key='match_selectbox')
+    match_ids = app.load_catalogue().by_season[SEASON]
+    selectbox.set_value(next(match_id for match_id in match_ids if match_id != selectbox.value))
+
+
+INTERACTIONS = {
+    'first_run': lambda at: None,
+    'rerun': lambda at: None,
+    'change_match': select_other_match,
+    'pass_map_view': lambda at: at.radio(key='match_view_radio').set_value('Mapa de Passe'),
+    'change_pass_team': lambda at: at.selectbox(key='pass_team_selectbox').set_value(
+        at.selectbox(key='pass_team_selectbox').options[1]),
+    'shot_map_view': lambda at: at.radio(key='match_view_radio').set_value('Mapa de Chute'),
+    'events_view': lambda at: at.radio(key='match_view_radio').set_value('Informações Gerais'),
+    'events_search': lambda at: at.text_input(key='events_search_input').input('a'),
+    'comparison_view': lambda at: at.radio(key='match_view_radio').set_value(
+        'Comparação de Jogadores'),
+    'change_radar_scale': lambda at: at.radio(key='radar_scale_radio').set_value('Percentil'),
+    'tournament_mode': lambda at: at.radio(key='mode_radio').set_value('Torneio'),
+}
+
+
+@pytest.fixture(scope='module')
+def app_test():
+    # As interações partem dos caches vazios, como na primeira visita ao app
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    return AppTest.from_file(APP_FILE, default_timeout=300)
+
+
+@pytest.mark.parametrize('name', list(INTERACTIONS))
+def test_interaction(benchmark, app_test, name):
+    '''
+    Cada interação parte do estado deixado pela anterior, na ordem de INTERACTIONS
+    '''
+    def setup():
+        # O pedantic usaria o valor retornado pelo set_value como argumentos do run
+        INTERACTIONS[name](app_test)
+
+    benchmark.pedantic(app_test.run, setup=setup, rounds=1)
+    assert not app_test.exception, app_test.exception[0].message
+
+    latest = instrumentation.registry.recent[-1]
+    stages = {}
+    for entry in latest['stages']:
+        if entry['stage'] in STAGES:
+            stages[entry['stage']] = stages.get(entry['stage'], 0) + entry['seconds']
+    benchmark.extra_info.update(peak_rss=latest['peak_rss'], stages=stages)
@@ -0,0 +1,67 @@
+'''
+Benchmark da renderização dos mapas de passes e chutes com volumes realistas:
+todos os passes de um time em uma partida e todos os chutes de um torneio,
+gerados aleatoriamente. O teste falha se a melhor rodada passar do limite.
+
+    python -m pytest tests/benchmarks/test_bench_maps.py
+'''
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import pyplot as plt
+
+from app import plot_pass_map, plot_shot_map
+
+TEAM_PASSES = 700
+TOURNAMENT_SHOTS = 1700
+ROUNDS = 3
+
+# Limites em segundos para uma renderização completa (desenho + PNG)
+THRESHOLDS = {
+    'pass_map_team': 2.0,
+    'shot_map_tournament': 2.0,
+}
+
+
+def make_passes(n, rng) -> pd.DataFrame:
+    x = rng.uniform(0, 120, n).astype(np.float32)
+    y = rng.uniform(0, 80, n).astype(np.float32)
+    outcome = pd.Categorical(np.where(rng.random(n) < 0.8, None, 'Incomplete'))
+    return pd.DataFrame({
+        'location_x': x,
+        'location_y': y,
+        'pass_end_location_x': np.clip(x + rng.normal(10, 15, n), 0, 120).astype(np.float32),
+        'pass_end_location_y': np.clip(y + rng.normal(0, 15, n), 0, 80).astype(np.float32),
+        'pass_outcome': outcome,
+    })
+
+
+def make_shots(n, rng) -> pd.DataFrame:
+    outcome = pd.Categorical(rng.choice(['Goal', 'Saved', 'Off T', 'Blocked'], n,
+                                        p=[0.1, 0.3, 0.35, 0.25]))
+    return pd.DataFrame({
+        'location_x': rng.uniform(90, 120, n).astype(np.float32),
+        'location_y': rng.uniform(15, 65, n).astype(np.float32),
+        'shot_outcome': outcome,
+    })
+
+
+def render(plot, events):
+    fig = plot(events)
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+@pytest.mark.parametrize('name, plot, make, n', [
+    ('pass_map_team', plot_pass_map, make_passes, TEAM_PASSES),
+    ('shot_map_tournament', plot_shot_map, make_shots, TOURNAMENT_SHOTS),
+])
+def test_render(benchmark, name, plot, make, n):
+    events = make(n, np.random.default_rng(0))
+    benchmark.pedantic(render, args=(plot, events), rounds=ROUNDS, warmup_rounds=1)
+
+    # Sem estatísticas quando os benchmarks são desativados (--benchmark-disable)
+    if benchmark.stats:
+        assert benchmark.stats.stats.min <= THRESHOLDS[name]
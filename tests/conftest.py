@@ -0,0 +1,33 @@
+'''
+Configuração dos testes: o app roda sobre o espelho de fixtures, sem rede, com
+o armazém e os caches em um diretório temporário.
+
+    python -m pytest -q
+    python -m pytest -q --benchmark-skip   # sem os benchmarks de tests/benchmarks
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+import matplotlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix='dashboard_tests_')
+
+# As variáveis precisam estar definidas antes de importar os módulos do app
+os.environ['STATSBOMB_DATA_DIR'] = os.path.join(ROOT_DIR, 'fixtures', 'statsbomb')
+os.environ['STATSBOMB_OFFLINE'] = '1'
+os.environ['WAREHOUSE_DIR'] = os.path.join(TMP_DIR, 'warehouse')
+os.environ['HTTP_CACHE_DIR'] = os.path.join(TMP_DIR, 'http_cache')
+os.environ['CACHE_BACKEND'] = 'none'
+os.environ['CACHE_DIR'] = os.path.join(TMP_DIR, 'cache')
+for name in ('FIGURE_CACHE_DIR', 'METRICS_LOG', 'STATSBOMB_OPEN_DATA_URL'):
+    os.environ.pop(name, None)
+
+matplotlib.use('Agg')
+sys.path.insert(0, ROOT_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+import cache_backends
+
+
+class Clock:
+    '''
+    Relógio controlado pelo teste, no lugar do módulo time
+    '''
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeRedis:
+    '''
+    Substituto local de um servidor Redis, com os métodos usados pelo RedisBackend
+    '''
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+
+    def get(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.clock.time():
+            del self.values[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        assert isinstance(value, bytes)
+        self.values[key] = (value, None if ex is None else self.clock.time() + ex)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_backends, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['sqlite', 'arrow', 'redis'])
+def backend(request, tmp_path, clock):
+    if request.param == 'sqlite':
+        return cache_backends.SQLiteBackend(str(tmp_path / 'cache.sqlite'))
+    if request.param == 'arrow':
+        return cache_backends.ArrowBackend(str(tmp_path))
+    return cache_backends.RedisBackend(FakeRedis(clock))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'team': pd.Categorical(['Argentina', 'France', 'Argentina']),
+        'player': ['Lionel Messi', 'Kylian Mbappé', 'Ángel Di María'],
+        'x': pd.Series([60.5, 102.0, 88.25], dtype='float32'),
+        'position_id': pd.Series([17, 22, None], dtype='Int8'),
+        'goals': [3, 3, 1],
+    }).set_index(['team', 'player'])
+
+
+def test_bytes_round_trip(backend):
+    assert backend.get('missing') is None
+    backend.set('key', b'\x00value')
+    assert bytes(backend.get('key')) == b'\x00value'
+    backend.set('key', b'other')
+    assert bytes(backend.get('key')) == b'other'
+
+
+def test_frame_round_trip(backend, frame):
+    assert backend.get_frame('missing') is None
+    backend.set_frame('frame', frame)
+    pd.testing.assert_frame_equal(backend.get_frame('frame'), frame)
+
+
+def test_ttl_expiry(backend, clock, frame):
+    backend.set('short', b'value', ttl=10)
+    backend.set('forever', b'value')
+    backend.set_frame('frame', frame, ttl=10)
+
+    clock.now += 9
+    assert backend.get('short') is not None
+    assert backend.get_frame('frame') is not None
+
+    clock.now += 2
+    assert backend.get('short') is None
+    assert backend.get_frame('frame') is None
+    assert backend.get('forever') is not None
+
+
+def test_redis_receives_integer_ttl(clock):
+    client = FakeRedis(clock)
+    cache_backends.RedisBackend(client).set('key', b'value', ttl=2.5)
+    assert client.values['key'] == (b'value', clock.now + 2)
+
+
+def test_namespaced_keys_and_load_once(clock, frame):
+    client = FakeRedis(clock)
+    backend = cache_backends.NamespacedBackend(cache_backends.RedisBackend(client))
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return frame
+
+    for _ in range(2):
+        pd.testing.assert_frame_equal(backend.get_or_load_frame('catalogue', loader), frame)
+    assert len(calls) == 1
+    assert list(client.values) == [f'{cache_backends.NAMESPACE}:catalogue']
+
+
+def test_disabled_backend_never_caches(frame):
+    backend = cache_backends.create_backend('none')
+    assert not backend.enabled
+    backend.set('key', b'value')
+    assert backend.get('key') is None
+    assert backend.get_or_load_frame('frame', lambda: frame) is frame
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        cache_backends.create_backend('memcached')
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+import warehouse
+
+MATCHES = {3857260: '2022', 3869552: '2022', 3869685: '2022', 8658: '2018'}
+
+
+@pytest.fixture(scope='module', params=list(MATCHES))
+def index(request):
+    return warehouse.EventIndex(warehouse.load_match_events(request.param, MATCHES[request.param]))
+
+
+def naive_window(events, start=None, end=None, types=None, team=None, player=None):
+    mask = pd.Series(True, index=events.index)
+    if start is not None:
+        mask &= events['minute'] >= start
+    if end is not None:
+        mask &= events['minute'] <= end
+    if types is not None:
+        mask &= events['type'].isin(types)
+    if team is not None:
+        mask &= events['team'] == team
+    if player is not None:
+        mask &= events['player'] == player
+    return events[mask]
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, None), (0, 0), (10, 30), (45, 46), (44, 90), (90, None), (None, 15), (200, 300),
+])
+def test_window_matches_naive_filter(index, start, end):
+    events = index.events
+    pd.testing.assert_frame_equal(index.window(start, end), naive_window(events, start, end))
+
+    team = events['team'].dropna().iloc[0]
+    player = events.loc[events['type'] == 'Pass', 'player'].iloc[0]
+    pd.testing.assert_frame_equal(
+        index.window(start, end, types=['Pass', 'Shot'], team=team),
+        naive_window(events, start, end, types=['Pass', 'Shot'], team=team))
+    pd.testing.assert_frame_equal(
+        index.window(start, end, types=['Pass'], player=player),
+        naive_window(events, start, end, types=['Pass'], player=player))
+
+
+def naive_shot_chains(events, shots):
+    chains = []
+    for position, shot in shots.iterrows():
+        chain = events[(events['possession'] == shot['possession']) &
+                       (events['team'] == shot['team']) &
+                       (events.index <= position)]
+        chains.append(chain.assign(shot_id=shot['id']))
+    return pd.concat(chains)
+
+
+def test_shot_chains_match_naive_filter(index):
+    events = index.events
+    shots = events[events['type'] == 'Shot']
+    assert len(shots)
+
+    pd.testing.assert_frame_equal(index.shot_chains(shots), naive_shot_chains(events, shots))
+
+
+def test_shot_chains_of_a_window(index):
+    shots = index.window(60, None, types=['Shot'])
+    chains = index.shot_chains(shots)
+
+    assert chains['shot_id'].unique().tolist() == shots['id'].tolist()
+    assert (chains.groupby('shot_id', sort=False).tail(1)['id'] == shots['id'].to_numpy()).all()
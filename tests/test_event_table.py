@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+import warehouse
+
+MATCHES = {3857260: '2022', 3869552: '2022', 3869685: '2022', 8658: '2018'}
+
+
+@pytest.fixture(scope='module', params=list(MATCHES))
+def index(request):
+    return warehouse.EventIndex(warehouse.load_match_events(request.param, MATCHES[request.param]))
+
+
+def naive_search(events, columns, text):
+    mask = pd.Series(False, index=events.index)
+    for column in columns:
+        values = events[column].dropna()
+        mask |= values.astype(str).str.contains(text, case=False, regex=False) \
+            .reindex(events.index, fill_value=False)
+    return events[mask]
+
+
+@pytest.mark.parametrize('text', ['messi', 'PASS', 'Right Foot', 'an', 'nan', 'zzz'])
+def test_search_matches_naive_filter(index, text):
+    events = index.events
+    columns = ['type', 'player', 'team', 'pass_body_part', 'timestamp', 'pass_length']
+    assert isinstance(events['player'].dtype, pd.CategoricalDtype)
+
+    found = app.search_events(events, columns, text)
+
+    pd.testing.assert_frame_equal(found, naive_search(events, columns, text))
+
+
+def test_search_ignores_unused_categories(index):
+    events = index.events.head(5)
+    unused = sorted(set(index.events['player'].dropna()) - set(events['player'].dropna()))
+    assert len(app.search_events(events, ['player'], unused[0])) == 0
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_page_sorts_missing_values_last(index, ascending):
+    events = index.events
+    columns = ['index', 'pass_length']
+    ordered = pd.concat([
+        events.loc[events['pass_length'].notna(), columns]
+        .sort_values('pass_length', ascending=ascending, kind='stable'),
+        events.loc[events['pass_length'].isna(), columns],
+    ])
+
+    pages = [app.events_page(events, columns, 'pass_length', ascending, page, 100)
+             for page in range(1, -(-len(events) // 100) + 1)]
+
+    pd.testing.assert_frame_equal(pd.concat(pages), ordered)
+
+
+def test_page_bounds(index):
+    events = index.events
+    page_size = 250
+    last = -(-len(events) // page_size)
+
+    assert len(app.events_page(events, ['index'], page=1, page_size=page_size)) == page_size
+    tail = app.events_page(events, ['index'], page=last, page_size=page_size)
+    assert len(tail) == len(events) - (last - 1) * page_size
+    assert tail['index'].iloc[-1] == events['index'].iloc[-1]
+    assert app.events_page(events, ['index'], page=last + 1, page_size=page_size).empty
+    assert app.events_page(events.iloc[:0], ['index'], page=1, page_size=page_size).empty
+
+
+def test_type_columns_match_dropna(index):
+    events = index.events
+    for event_type in events['type'].dropna().unique():
+        expected = events[events['type'] == event_type].dropna(axis=1, how='all')
+        assert index.type_columns(event_type) == expected.columns.tolist(), event_type
+    assert index.type_columns('Unknown') == []
+
+
+def test_type_columns_are_cached(index):
+    first = index.type_columns('Pass')
+    assert index.type_columns('Pass') is first
+    assert np.isin(['type', 'pass_length'], first).all()
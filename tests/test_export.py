@@ -0,0 +1,73 @@
+import functools
+import io
+import json
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import export
+import warehouse
+
+CHUNK_ROWS = 250
+
+
+@pytest.fixture(scope='module')
+def events():
+    return warehouse.load_match_events(3857260, '2022')
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Vários blocos por arquivo, para testar as emendas entre eles
+    monkeypatch.setattr(export, 'iter_chunks',
+                        functools.partial(export.iter_chunks, chunk_rows=CHUNK_ROWS))
+
+
+def write(events, fmt) -> bytes:
+    f = io.BytesIO()
+    export.export(events, fmt, f)
+    return f.getvalue()
+
+
+def test_csv(events):
+    assert len(events) > 2 * CHUNK_ROWS
+    content = write(events, 'CSV')
+    result = pd.read_csv(io.BytesIO(content))
+
+    assert content.count(b'\nmatch_id,') == 0
+    assert result.columns.tolist() == events.columns.tolist()
+    assert result['id'].tolist() == events['id'].tolist()
+    players = events['player'].astype(object).fillna('')
+    assert result['player'].fillna('').tolist() == players.tolist()
+    pd.testing.assert_series_equal(result['location_x'], events['location_x'].astype(float))
+
+    related = events['related_events'].dropna()
+    parsed = result.loc[related.index, 'related_events'].map(json.loads)
+    assert parsed.tolist() == related.map(list).tolist()
+
+
+def test_jsonl(events):
+    lines = write(events, 'JSON Lines').decode('utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert len(records) == len(events)
+    assert [record['id'] for record in records] == events['id'].tolist()
+    row = events['related_events'].first_valid_index()
+    assert records[row]['related_events'] == list(events.loc[row, 'related_events'])
+    assert records[row]['player'] == events.loc[row, 'player']
+
+
+def test_parquet(events):
+    f = io.BytesIO(write(events, 'Parquet'))
+
+    assert pq.ParquetFile(f).num_row_groups == -(-len(events) // CHUNK_ROWS)
+    result = pq.read_table(f).to_pandas()
+    pd.testing.assert_frame_equal(result, events, check_categorical=False)
+
+
+def test_export_to_file_spools_to_disk(events, monkeypatch):
+    monkeypatch.setattr(export, 'SPOOL_MAX_BYTES', 1024)
+    with export.export_to_file(events, 'JSON Lines') as f:
+        assert f._rolled
+        assert f.read() == write(events, 'JSON Lines')
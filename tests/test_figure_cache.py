@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def figure_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'FIGURE_CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def write_png(path, size, mtime):
+    path.write_bytes(b'\x00' * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_removes_least_recently_used(figure_dir, monkeypatch):
+    monkeypatch.setattr(app, 'FIGURE_CACHE_DIR_MAX_BYTES', 250)
+    for name, mtime in [('old', 1), ('used', 3), ('new', 2)]:
+        write_png(figure_dir / f'{name}.png', 100, mtime)
+    (figure_dir / 'other.tmp').write_bytes(b'\x00' * 1000)
+
+    app._prune_figure_dir()
+
+    assert sorted(os.listdir(figure_dir)) == ['new.png', 'other.tmp', 'used.png']
+
+
+def test_disk_hit_refreshes_last_use(figure_dir, monkeypatch):
+    monkeypatch.setattr(app, 'FIGURE_CACHE_DIR_MAX_BYTES', 150)
+    key = ('test_figure',)
+    digest = app.hashlib.sha1(repr(key).encode()).hexdigest()
+    write_png(figure_dir / f'{digest}.png', 100, 1)
+    write_png(figure_dir / 'newer.png', 100, 2)
+
+    png = app._load_or_render(key, draw=None, rc=None, load=None)
+    app._prune_figure_dir()
+
+    assert png == b'\x00' * 100
+    assert os.listdir(figure_dir) == [f'{digest}.png']
+
+
+def test_shared_figures_expire(monkeypatch):
+    calls = []
+
+    class Backend:
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl=None):
+            calls.append((key, ttl))
+
+    monkeypatch.setattr(app, 'FIGURE_CACHE_DIR', None)
+    monkeypatch.setattr(app.cache_backends, 'get_backend', Backend)
+    monkeypatch.setattr(app, '_savefig', lambda fig: b'png')
+    monkeypatch.setattr(app.plt, 'close', lambda fig: None)
+
+    assert app._load_or_render(('test_figure',), lambda: None, rc=None, load=None) == b'png'
+    assert [ttl for _, ttl in calls] == [app.FIGURE_SHARED_TTL]
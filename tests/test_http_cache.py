@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+import pytest
+import requests
+
+import data_source
+
+RELPATH = 'matches/43/106.json'
+EXPIRE_AFTER = 1
+
+
+class OpenDataServer:
+    '''
+    Substituto local do open-data da StatsBomb, servindo o espelho de fixtures com
+    ETag e respondendo 304 às requisições condicionais
+    '''
+
+    def __init__(self):
+        self.requests = []
+        self.failing = False
+        self.delay = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.delay)
+                path = os.path.join(data_source.DATA_DIR, self.path.lstrip('/') + '.gz')
+                if server.failing or not os.path.exists(path):
+                    server.requests.append((self.path, 500 if server.failing else 404))
+                    self.send_response(500 if server.failing else 404)
+                    self.end_headers()
+                    return
+
+                with open(path, 'rb') as f:
+                    body = gzip.decompress(f.read())
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.requests.append((self.path, 304))
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                server.requests.append((self.path, 200))
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = OpenDataServer()
+    monkeypatch.setattr(data_source, 'DOWNLOAD_URL', server.url)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_source, 'HTTP_CACHE_DIR', str(tmp_path))
+    return str(tmp_path)
+
+
+def expected_content():
+    return data_source.read_local(RELPATH)
+
+
+def fetch_expired(session, relpath=RELPATH):
+    data_source.fetch_remote(relpath, session=session)
+    time.sleep(EXPIRE_AFTER + 0.1)
+    return data_source.fetch_remote(relpath, session=session)
+
+
+def test_cache_is_shared_across_sessions(server, cache_dir):
+    first = data_source.create_session(cache_dir=cache_dir)
+    assert data_source.fetch_remote(RELPATH, session=first) == expected_content()
+
+    # Uma nova sessão sobre o mesmo diretório, como após reiniciar ou em outra réplica
+    second = data_source.create_session(cache_dir=cache_dir)
+    content = data_source.fetch_remote(RELPATH, session=second)
+
+    assert orjson.loads(content) == orjson.loads(expected_content())
+    assert server.requests == [('/' + RELPATH, 200)]
+
+
+def test_expired_response_is_revalidated_with_etag(server, cache_dir):
+    session = data_source.create_session(cache_dir=cache_dir, expire_after=EXPIRE_AFTER)
+    content = fetch_expired(session)
+
+    assert content == expected_content()
+    assert server.requests == [('/' + RELPATH, 200), ('/' + RELPATH, 304)]
+
+
+def test_refresh_revalidates_fresh_response(server, cache_dir):
+    session = data_source.create_session(cache_dir=cache_dir)
+    data_source.fetch_remote(RELPATH, session=session)
+    data_source.fetch_remote(RELPATH, session=session, refresh=True)
+
+    assert [status for _, status in server.requests] == [200, 304]
+
+
+def test_stale_response_is_served_on_error(server, cache_dir):
+    session = data_source.create_session(cache_dir=cache_dir, expire_after=EXPIRE_AFTER)
+    data_source.fetch_remote(RELPATH, session=session)
+    time.sleep(EXPIRE_AFTER + 0.1)
+
+    server.failing = True
+    assert data_source.fetch_remote(RELPATH, session=session) == expected_content()
+    assert server.requests[-1] == ('/' + RELPATH, 500)
+
+    server.close()
+    assert data_source.fetch_remote(RELPATH, session=session) == expected_content()
+
+
+def test_missing_file_raises(server, cache_dir):
+    session = data_source.create_session(cache_dir=cache_dir)
+    with pytest.raises(Exception):
+        data_source.fetch_remote('events/0.json', session=session)
+
+
+def test_stalled_server_times_out(server, cache_dir):
+    session = data_source.create_session(cache_dir=cache_dir, timeout=(1, 0.2))
+    server.delay = 1
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        data_source.fetch_remote(RELPATH, session=session)
+    assert time.perf_counter() - start < 1
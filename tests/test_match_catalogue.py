@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+import app
+
+GROUP_STAGE_ID = 3857260
+THIRD_PLACE_ID = 3869552
+
+
+@pytest.fixture(scope='module')
+def matches():
+    return app.fetch_matches()
+
+
+def test_same_fixture_twice_in_a_season(matches):
+    catalogue = app.MatchCatalogue(matches)
+    croatia_morocco = [match_id for match_id in catalogue.by_season['2022']
+                       if catalogue.labels[match_id].endswith('Croatia x Morocco')]
+
+    assert croatia_morocco == [GROUP_STAGE_ID, THIRD_PLACE_ID]
+    assert catalogue.labels[GROUP_STAGE_ID] == '2022-11-23 · Group Stage · Croatia x Morocco'
+    assert catalogue.labels[THIRD_PLACE_ID] == '2022-12-17 · 3rd Place Final · Croatia x Morocco'
+    assert catalogue.match(THIRD_PLACE_ID)['competition_stage'].item() == '3rd Place Final'
+
+
+def test_catalogue_indexes(matches):
+    catalogue = app.MatchCatalogue(matches)
+
+    assert catalogue.seasons == ['2022', '2018']
+    assert catalogue.by_season['2018'] == [8658]
+    assert len(set(catalogue.labels.values())) == len(matches)
+    for season, match_ids in catalogue.by_season.items():
+        assert catalogue.season_matches[season].index.tolist() == match_ids
+        dates = catalogue.matches.loc[match_ids, 'match_date'].tolist()
+        assert dates == sorted(dates)
+
+
+def test_identical_labels_get_match_id_suffix(matches):
+    replay = matches[matches['match_id'] == GROUP_STAGE_ID].assign(match_id=1)
+    catalogue = app.MatchCatalogue(pd.concat([matches, replay], ignore_index=True))
+
+    assert catalogue.labels[GROUP_STAGE_ID] == \
+        '2022-11-23 · Group Stage · Croatia x Morocco (3857260)'
+    assert catalogue.labels[1] == '2022-11-23 · Group Stage · Croatia x Morocco (1)'
+    assert catalogue.labels[THIRD_PLACE_ID] == '2022-12-17 · 3rd Place Final · Croatia x Morocco'
+    assert len(set(catalogue.labels.values())) == len(matches) + 1
@@ -0,0 +1,63 @@
+'''
+Orçamento de tempo das execuções do app sobre o espelho de fixtures. Os limites
+podem ser ajustados para máquinas mais lentas pelas variáveis de ambiente
+FIRST_RUN_BUDGET, VIEW_BUDGET e RERUN_BUDGET (segundos).
+'''
+import os
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import instrumentation
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# A primeira execução inclui a leitura das fixtures e a gravação no armazém
+FIRST_RUN_BUDGET = float(os.environ.get('FIRST_RUN_BUDGET', '20'))
+# Primeira exibição de uma visualização, com o desenho da figura
+VIEW_BUDGET = float(os.environ.get('VIEW_BUDGET', '6'))
+# Nova execução com os dados e as figuras já em cache
+RERUN_BUDGET = float(os.environ.get('RERUN_BUDGET', '2'))
+
+VIEW_STAGES = {
+    'Informações Gerais': 'display_formations',
+    'Mapa de Passe': 'display_pass_map',
+    'Mapa de Chute': 'display_shot_map',
+    'Comparação de Jogadores': 'display_comparison_chart',
+}
+
+
+def run(at) -> float:
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    assert not at.exception, at.exception[0].message
+    return seconds
+
+
+def executed_views() -> set:
+    stages = {entry['stage'] for entry in instrumentation.registry.recent[-1]['stages']}
+    return {view for view, stage in VIEW_STAGES.items() if stage in stages}
+
+
+@pytest.fixture(scope='module')
+def app_test():
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    seconds = run(at)
+    assert seconds < FIRST_RUN_BUDGET
+    return at
+
+
+def test_rerun_within_budget(app_test):
+    assert run(app_test) < RERUN_BUDGET
+    assert executed_views() == {'Informações Gerais'}
+
+
+@pytest.mark.parametrize('view', list(VIEW_STAGES))
+def test_only_selected_view_runs(app_test, view):
+    app_test.radio(key='match_view_radio').set_value(view)
+    assert run(app_test) < VIEW_BUDGET
+    assert executed_views() == {view}
+
+    assert run(app_test) < RERUN_BUDGET
+    assert executed_views() == {view}
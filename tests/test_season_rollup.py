@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+import warehouse
+
+SEASON_2022 = [3857260, 3869552, 3869685]
+
+
+@pytest.fixture(scope='module')
+def match_stats():
+    return {match_id: warehouse.load_match_stats(match_id, '2022') for match_id in SEASON_2022}
+
+
+def test_rollup_adds_matches_incrementally(match_stats):
+    rollup = warehouse.SeasonRollup()
+    for i, (match_id, stats) in enumerate(match_stats.items(), 1):
+        assert rollup.add(match_id, stats)
+        expected = warehouse.combine_stats(list(match_stats.values())[:i])
+        pd.testing.assert_frame_equal(rollup.totals, expected, check_index_type=False)
+        assert len(rollup.match_rows) == sum(len(frame) for frame in list(match_stats.values())[:i])
+
+    totals = rollup.totals
+    assert not rollup.add(SEASON_2022[0], match_stats[SEASON_2022[0]])
+    assert rollup.totals is totals
+    assert rollup.match_ids == set(SEASON_2022)
+    # Croácia e Marrocos se enfrentaram duas vezes
+    assert (rollup.totals.loc['Croatia', 'matches'] == 2).any()
+
+
+def test_percentiles_against_reference(match_stats):
+    rollup = warehouse.SeasonRollup()
+    for match_id, stats in match_stats.items():
+        rollup.add(match_id, stats)
+    totals = rollup.totals
+
+    pd.testing.assert_frame_equal(warehouse.percentiles(totals, totals),
+                                  warehouse.percentiles(totals))
+
+    final = match_stats[3869685]
+    scaled = warehouse.percentiles(final, rollup.match_rows)
+    for metric in warehouse.METRICS:
+        reference = rollup.match_rows[metric]
+        expected = final[metric].map(lambda value: (reference <= value).mean() * 100)
+        pd.testing.assert_series_equal(scaled[metric], expected, check_names=False)
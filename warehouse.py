@@ -0,0 +1,848 @@
+'''
+Armazém colunar dos eventos das partidas em Parquet.
+
+Cada partida é gravada uma única vez em events/season=<temporada>/match_id=<id>/,
+com as colunas de texto (tipo, time, jogador, resultados...) codificadas como
+categorias e as colunas de localização separadas em coordenadas float32. Assim
+os filtros por time, jogador ou tipo comparam códigos inteiros, e as consultas
+leem do disco apenas as partições, colunas e linhas necessárias.
+
+O JSON de eventos é lido uma única vez e separado em três tabelas: eventos,
+escalações táticas (Starting XI e mudanças táticas) e freeze frames dos chutes.
+Junto com elas é gravada a tabela de estatísticas por jogador da partida,
+calculada em uma única passada. As estatísticas do torneio somam essas tabelas,
+sem reprocessar os eventos.
+
+Para carregar todas as partidas da Copa do Mundo no armazém:
+
+    python warehouse.py ingest
+
+Variáveis de ambiente:
+    WAREHOUSE_DIR: diretório do armazém (padrão: data/warehouse)
+'''
+import argparse
+import glob
+import logging
+import os
+import tempfile
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from statsbombpy import sb
+from statsbombpy.entities import events as index_events
+from statsbombpy.helpers import filter_and_group_events
+
+import data_source
+import instrumentation
+
+WAREHOUSE_DIR = os.environ.get('WAREHOUSE_DIR',
+                               os.path.join(data_source.BASE_DIR, 'data', 'warehouse'))
+EVENTS_DIR = os.path.join(WAREHOUSE_DIR, 'events')
+EVENTS_FILE = 'events.parquet'
+TACTICS_FILE = 'tactics.parquet'
+FREEZE_FRAMES_FILE = 'freeze_frames.parquet'
+STATS_FILE = 'player_stats.parquet'
+
+# Métricas contadas por jogador em cada partida
+METRICS = ['completed_dribbles', 'non_penalty_goals', 'ball_recoveries', 'tackles',
+           'blocks', 'passes', 'completed_passes', 'shots', 'goals']
+
+# Colunas de texto com valores praticamente únicos, que não se beneficiam de categorias
+TEXT_COLUMNS = ['id', 'timestamp']
+
+logger = logging.getLogger(__name__)
+
+_ingest_locks = {}
+_ingest_locks_lock = threading.Lock()
+
+
+class MatchEvents(NamedTuple):
+    '''
+    Dados de uma partida obtidos de uma única leitura do JSON de eventos
+
+    Attributes:
+        events (pd.DataFrame): Eventos normalizados, no esquema de colunas de `sb.events`
+        tactics (pd.DataFrame): Jogadores de cada escalação tática, indexados por (type, team)
+        freeze_frames (pd.DataFrame): Posição dos jogadores no momento de cada chute
+    '''
+    events: pd.DataFrame
+    tactics: pd.DataFrame
+    freeze_frames: pd.DataFrame
+
+
+def parse_events(raw: list, match_id) -> MatchEvents:
+    '''
+    Converte o JSON de eventos de uma partida nas tabelas do armazém, separando
+    as escalações táticas e os freeze frames dos eventos
+
+    Args:
+        raw (list): JSON de eventos do open-data da StatsBomb
+        match_id (int): ID da partida
+
+    Returns:
+        match (MatchEvents): Eventos, escalações táticas e freeze frames normalizados
+    '''
+    tactics = []
+    freeze_frames = []
+
+    for event in raw:
+        lineup = event.pop('tactics', None)
+        if lineup is not None:
+            event['tactics_formation'] = str(lineup['formation'])
+            tactics.extend({
+                'id': event['id'],
+                'type': event['type']['name'],
+                'team': event['team']['name'],
+                'tactics_formation': str(lineup['formation']),
+                'player_id': player['player']['id'],
+                'player_name': player['player']['name'],
+                'position_id': player['position']['id'],
+                'position_name': player['position']['name'],
+                'jersey_number': player['jersey_number'],
+            } for player in lineup['lineup'])
+
+        shot = event.get('shot')
+        frame = shot.pop('freeze_frame', None) if shot is not None else None
+        if frame is not None:
+            freeze_frames.extend({
+                'id': event['id'],
+                'location_x': player['location'][0],
+                'location_y': player['location'][1],
+                'player_id': player['player']['id'],
+                'player_name': player['player']['name'],
+                'position_name': player['position']['name'],
+                'teammate': player['teammate'],
+            } for player in frame)
+
+    grouped = filter_and_group_events(index_events(raw, int(match_id)), {}, 'dataframe', True)
+    events = pd.concat([pd.DataFrame(group) for group in grouped.values()],
+                       ignore_index=True, sort=True)
+
+    tactics = pd.DataFrame(tactics, columns=[
+        'id', 'type', 'team', 'tactics_formation', 'player_id', 'player_name',
+        'position_id', 'position_name', 'jersey_number'])
+    freeze_frames = pd.DataFrame(freeze_frames, columns=[
+        'id', 'location_x', 'location_y', 'player_id', 'player_name', 'position_name', 'teammate'])
+    for frame in (tactics, freeze_frames):
+        for column in ['type', 'team', 'player_name', 'position_name']:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('category')
+    freeze_frames[['location_x', 'location_y']] = freeze_frames[
+        ['location_x', 'location_y']].astype(np.float32)
+
+    return MatchEvents(normalize_events(events), tactics, freeze_frames)
+
+
+@instrumentation.timed
+def fetch_match(match_id) -> MatchEvents:
+    '''
+    Lê e converte o JSON de eventos de uma partida
+
+    Args:
+        match_id (int): ID da partida
+
+    Returns:
+        match (MatchEvents): Eventos, escalações táticas e freeze frames normalizados
+    '''
+    return parse_events(data_source.get_json(f'events/{int(match_id)}.json'), match_id)
+
+
+def parse_lineups(raw: list) -> pd.DataFrame:
+    '''
+    Converte o JSON de escalações de uma partida em uma tabela com um jogador por
+    linha e a posição em que ele começou a jogar
+
+    Args:
+        raw (list): JSON de escalações do open-data da StatsBomb
+
+    Returns:
+        lineups (pd.DataFrame): Escalações indexadas por (team, player_id)
+    '''
+    rows = []
+    for team in raw:
+        for player in team['lineup']:
+            # Jogadores que não entraram em campo não têm posição
+            position = player['positions'][0] if player['positions'] else {}
+            rows.append({
+                'team': team['team_name'],
+                'player_id': player['player_id'],
+                'player_name': player['player_name'],
+                'player_nickname': player['player_nickname'],
+                'jersey_number': player['jersey_number'],
+                'position_id': position.get('position_id'),
+                'position': position.get('position'),
+                'start_reason': position.get('start_reason'),
+            })
+
+    lineups = pd.DataFrame(rows, columns=[
+        'team', 'player_id', 'player_name', 'player_nickname', 'jersey_number',
+        'position_id', 'position', 'start_reason'])
+    for column in ['team', 'position', 'start_reason']:
+        lineups[column] = lineups[column].astype('category')
+    lineups['position_id'] = lineups['position_id'].astype('Int8')
+    return lineups.set_index(['team', 'player_id']).sort_index()
+
+
+def split_locations(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Separa as colunas de localização (listas [x, y] ou [x, y, z]) em colunas
+    float32 `<coluna>_x`, `<coluna>_y` e, quando houver, `<coluna>_z`
+
+    Args:
+        events (pd.DataFrame): DataFrame de eventos no formato de `sb.events`
+
+    Returns:
+        events (pd.DataFrame): DataFrame com as coordenadas em colunas numéricas
+    '''
+    location_columns = [column for column in events.columns
+                        if column == 'location' or column.endswith('_location')]
+
+    for column in location_columns:
+        values = events[column]
+        mask = values.notna().to_numpy()
+        points = values[mask].tolist()
+        width = max((len(point) for point in points), default=2)
+
+        coords = np.full((len(events), width), np.nan, dtype=np.float32)
+        if points:
+            coords[mask] = [point + [np.nan] * (width - len(point)) for point in points]
+
+        for axis, name in enumerate('xyz'[:width]):
+            events[f'{column}_{name}'] = coords[:, axis]
+
+    return events.drop(columns=location_columns)
+
+
+def normalize_events(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Converte o DataFrame de `sb.events` para o formato colunar do armazém:
+    coordenadas float32, textos como categorias e marcadores como booleanos
+
+    Args:
+        events (pd.DataFrame): DataFrame de eventos no formato de `sb.events`
+
+    Returns:
+        events (pd.DataFrame): DataFrame de eventos normalizado
+    '''
+    events = split_locations(events.copy())
+
+    for column in events.columns:
+        values = events[column]
+        if values.dtype != object:
+            continue
+
+        kinds = set(values.dropna().map(type))
+        if kinds == {str} and column not in TEXT_COLUMNS:
+            events[column] = values.astype('category')
+        elif kinds == {bool}:
+            events[column] = values.astype('boolean')
+
+    for column in ['index', 'period', 'minute', 'second', 'possession']:
+        if column in events.columns:
+            events[column] = pd.to_numeric(events[column], downcast='integer')
+
+    return events.sort_values('index', ignore_index=True)
+
+
+def _column(events, column) -> pd.Series:
+    if column in events.columns:
+        return events[column]
+    return pd.Series(np.nan, index=events.index)
+
+
+def player_match_stats(events: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Calcula as métricas de cada jogador em uma partida, com um único groupby,
+    e os minutos jogados a partir das substituições
+
+    Args:
+        events (pd.DataFrame): DataFrame de eventos normalizado de uma partida
+
+    Returns:
+        stats (pd.DataFrame): Estatísticas indexadas por (team, player), com uma
+            coluna por métrica e a coluna minutes
+    '''
+    event_type = events['type']
+    shot_outcome = _column(events, 'shot_outcome')
+    flags = pd.DataFrame({
+        'completed_dribbles': (event_type == 'Dribble') & (_column(events, 'dribble_outcome') == 'Complete'),
+        'non_penalty_goals': (event_type == 'Shot') & (shot_outcome == 'Goal') &
+                             (_column(events, 'shot_type') != 'Penalty'),
+        'ball_recoveries': event_type == 'Ball Recovery',
+        'tackles': (event_type == 'Duel') & (_column(events, 'duel_type') == 'Tackle') &
+                   (_column(events, 'duel_outcome') == 'Won'),
+        'blocks': event_type == 'Block',
+        'passes': event_type == 'Pass',
+        'completed_passes': (event_type == 'Pass') & _column(events, 'pass_outcome').isna(),
+        'shots': event_type == 'Shot',
+        'goals': (event_type == 'Shot') & (shot_outcome == 'Goal'),
+    }, index=events.index).astype('int16')
+    flags['team'] = events['team']
+    flags['player'] = events['player']
+
+    stats = flags.dropna(subset=['player']).groupby(['team', 'player'], observed=True).sum()
+
+    # Titulares jogam do início ao fim, exceto quando são substituídos
+    elapsed = events['minute'] + events['second'] / 60
+    substitutions = event_type == 'Substitution'
+    entered = elapsed[substitutions].groupby(
+        _column(events, 'substitution_replacement')[substitutions], observed=True).min()
+    left = elapsed[substitutions].groupby(events['player'][substitutions], observed=True).min()
+
+    players = stats.index.get_level_values('player')
+    start = entered.reindex(players).fillna(0).to_numpy()
+    end = left.reindex(players).fillna(elapsed.max()).to_numpy()
+    stats['minutes'] = np.maximum(end - start, 1).astype(np.float32)
+
+    return stats
+
+
+def per_90(stats: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Normaliza as métricas pelo tempo jogado, em valores por 90 minutos
+
+    Args:
+        stats (pd.DataFrame): Estatísticas com as métricas e a coluna minutes
+
+    Returns:
+        stats (pd.DataFrame): Métricas por 90 minutos
+    '''
+    return stats[METRICS].div(stats['minutes'], axis=0) * 90
+
+
+def percentiles(stats: pd.DataFrame, reference=None) -> pd.DataFrame:
+    '''
+    Converte cada métrica no percentil do jogador em uma distribuição de referência:
+    a fração das linhas da referência com valor menor ou igual ao do jogador
+
+    Args:
+        stats (pd.DataFrame): Estatísticas com as métricas
+        reference (pd.DataFrame): Estatísticas que formam a distribuição, ex.: todos
+            os jogadores do torneio; a própria tabela quando omitida
+
+    Returns:
+        stats (pd.DataFrame): Percentis de 0 a 100 de cada métrica
+    '''
+    if reference is None:
+        return stats[METRICS].rank(pct=True, method='max') * 100
+
+    scaled = {}
+    for metric in METRICS:
+        values = np.sort(reference[metric].to_numpy())
+        scaled[metric] = np.searchsorted(values, stats[metric].to_numpy(), side='right')
+    return pd.DataFrame(scaled, index=stats.index) / max(len(reference), 1) * 100
+
+
+class SeasonRollup:
+    '''
+    Estatísticas por jogador de uma temporada, atualizadas partida a partida: cada
+    partida nova soma apenas as suas linhas ao total, sem refazer as anteriores.
+
+    Guarda também as linhas de cada partida (jogador × partida), que servem de
+    referência para comparar o desempenho em uma partida com o resto do torneio.
+    Os atributos são trocados de uma vez a cada partida somada, então leitores em
+    outras threads sempre veem um total consistente.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = []
+        self._match_rows = None
+        self.match_ids = frozenset()
+        self.totals = combine_stats([])
+
+    def add(self, match_id, stats: pd.DataFrame) -> bool:
+        '''
+        Soma as estatísticas de uma partida ao total da temporada
+
+        Args:
+            match_id (int): ID da partida
+            stats (pd.DataFrame): Estatísticas da partida, indexadas por (team, player)
+
+        Returns:
+            added (bool): Se a partida foi somada; False quando ela já estava no total
+        '''
+        match_id = int(match_id)
+        with self._lock:
+            if match_id in self.match_ids:
+                return False
+            rows = stats.assign(matches=1)
+            totals = rows if not self.match_ids else pd.concat([self.totals, rows])
+            self.totals = totals.groupby(level=['team', 'player'], observed=True).sum()
+            self._frames.append(rows)
+            self._match_rows = None
+            self.match_ids = self.match_ids | {match_id}
+        return True
+
+    @property
+    def match_rows(self) -> pd.DataFrame:
+        '''
+        Estatísticas de cada jogador em cada partida somada, indexadas por (team, player)
+        '''
+        with self._lock:
+            if self._match_rows is None:
+                self._match_rows = pd.concat(self._frames) if self._frames else self.totals
+            return self._match_rows
+
+
+class EventIndex:
+    '''
+    Índice dos eventos de uma partida por tempo de jogo e por posse de bola,
+    montado uma única vez para que os filtros de intervalo de minutos e as
+    jogadas de cada chute não percorram o DataFrame inteiro a cada consulta.
+
+    Dentro de cada período as linhas ficam ordenadas pelo relógio (minuto e
+    segundo), e um intervalo de minutos é encontrado por busca binária. As
+    posses de bola são sequências contíguas de eventos, guardadas como o
+    intervalo de linhas de cada uma.
+
+    Args:
+        events (pd.DataFrame): Eventos normalizados da partida, na ordem do campo `index`
+    '''
+
+    def __init__(self, events):
+        self.events = events
+        clock = events['minute'].to_numpy(np.int32) * 60 + events['second'].to_numpy(np.int32)
+        period = events['period'].to_numpy()
+
+        # O acréscimo do primeiro tempo tem os mesmos minutos do início do segundo,
+        # então cada período tem seu próprio eixo ordenado
+        self.periods = {}
+        for value in np.unique(period):
+            rows = np.flatnonzero(period == value)
+            order = np.argsort(clock[rows], kind='stable')
+            self.periods[int(value)] = (clock[rows][order], rows[order])
+
+        # Início de cada posse de bola, em uma única passada
+        possession = events['possession'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, possession[1:] != possession[:-1]])
+        self.possession_ids = possession[starts]
+        self.possession_bounds = np.r_[starts, len(events)]
+        self.possession_start = np.repeat(starts, np.diff(self.possession_bounds))
+        self._type_columns = None
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        Memória ocupada pelo índice, incluindo os eventos, que o índice mantém em
+        memória mesmo depois que as tabelas da partida saem do EventStore
+        '''
+        arrays = [self.possession_ids, self.possession_bounds, self.possession_start]
+        arrays += [array for pair in self.periods.values() for array in pair]
+        return (sum(array.nbytes for array in arrays) +
+                int(self.events.memory_usage(deep=True).sum()))
+
+    @property
+    def max_minute(self) -> int:
+        '''
+        Último minuto com eventos na partida
+        '''
+        return int(self.events['minute'].max()) if len(self.events) else 0
+
+    def rows(self, start_minute=None, end_minute=None) -> np.ndarray:
+        '''
+        Retorna as linhas dos eventos com minuto em [start_minute, end_minute], na ordem da partida
+
+        Args:
+            start_minute (int): Primeiro minuto incluído; início da partida quando omitido
+            end_minute (int): Último minuto incluído; fim da partida quando omitido
+
+        Returns:
+            rows (np.ndarray): Posições das linhas em `events`
+        '''
+        low = -1 if start_minute is None else start_minute * 60
+        high = np.iinfo(np.int32).max if end_minute is None else (end_minute + 1) * 60
+        parts = [rows[np.searchsorted(clock, low):np.searchsorted(clock, high)]
+                 for clock, rows in self.periods.values()]
+        return np.sort(np.concatenate(parts)) if parts else np.array([], dtype=np.int64)
+
+    def window(self, start_minute=None, end_minute=None, types=None, team=None,
+               player=None) -> pd.DataFrame:
+        '''
+        Retorna os eventos de um intervalo de minutos, filtrados apenas dentro do intervalo
+
+        Args:
+            start_minute (int): Primeiro minuto incluído
+            end_minute (int): Último minuto incluído
+            types (list): Tipos de evento, ex.: ['Pass']
+            team (str): Nome do time
+            player (str): Nome do jogador
+
+        Returns:
+            events (pd.DataFrame): Eventos do intervalo
+        '''
+        events = self.events.iloc[self.rows(start_minute, end_minute)]
+        if types is not None:
+            events = events[events['type'].isin(types)]
+        if team is not None:
+            events = events[events['team'] == team]
+        if player is not None:
+            events = events[events['player'] == player]
+        return events
+
+    def type_columns(self, event_type) -> list:
+        '''
+        Retorna as colunas com algum valor preenchido para um tipo de evento. Na
+        primeira chamada as colunas de todos os tipos são calculadas de uma vez.
+
+        Args:
+            event_type (str): Tipo de evento, ex.: 'Pass'
+
+        Returns:
+            columns (list): Colunas na ordem do DataFrame de eventos
+        '''
+        if self._type_columns is None:
+            filled = self.events.notna().groupby(self.events['type'], observed=True).any()
+            self._type_columns = {event_type: filled.columns[row].tolist()
+                                  for event_type, row in zip(filled.index, filled.to_numpy())}
+        return self._type_columns.get(event_type, [])
+
+    def possession(self, possession_id) -> pd.DataFrame:
+        '''
+        Retorna os eventos de uma posse de bola
+
+        Args:
+            possession_id (int): Número da posse de bola na partida
+
+        Returns:
+            events (pd.DataFrame): Eventos da posse
+        '''
+        i = np.searchsorted(self.possession_ids, possession_id)
+        if i == len(self.possession_ids) or self.possession_ids[i] != possession_id:
+            return self.events.iloc[:0]
+        return self.events.iloc[self.possession_bounds[i]:self.possession_bounds[i + 1]]
+
+    def shot_chains(self, shots: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Retorna a jogada que levou a cada chute: os eventos do time que chutou
+        desde o início da posse de bola até o chute
+
+        Args:
+            shots (pd.DataFrame): Chutes da partida, com o índice de `events`
+
+        Returns:
+            build_up (pd.DataFrame): Eventos das jogadas, com a coluna `shot_id`
+                indicando o chute de cada jogada
+        '''
+        ends = self.events.index.get_indexer(shots.index)
+        starts = self.possession_start[ends]
+        lengths = ends - starts + 1
+        # Concatena os intervalos [start, end] de todos os chutes sem laço em Python
+        offsets = np.repeat(starts - (lengths.cumsum() - lengths), lengths)
+        rows = np.arange(lengths.sum()) + offsets
+
+        build_up = self.events.iloc[rows].assign(
+            shot_id=np.repeat(shots['id'].to_numpy(), lengths))
+        teams = np.repeat(shots['team'].astype(object).to_numpy(), lengths)
+        return build_up[build_up['team'].astype(object).to_numpy() == teams]
+
+
+def match_dir(season, match_id) -> str:
+    '''
+    Retorna o diretório da partição de uma partida no armazém
+
+    Args:
+        season (str): Temporada da partida, ex.: '2022'
+        match_id (int): ID da partida
+
+    Returns:
+        path (str): Diretório da partição
+    '''
+    return os.path.join(EVENTS_DIR, f'season={season}', f'match_id={int(match_id)}')
+
+
+def is_ingested(season, match_id) -> bool:
+    '''
+    Verifica se a partida já foi gravada no armazém no formato atual
+
+    Args:
+        season (str): Temporada da partida
+        match_id (int): ID da partida
+
+    Returns:
+        ingested (bool): Se todos os arquivos da partida existem
+    '''
+    directory = match_dir(season, match_id)
+    return all(os.path.exists(os.path.join(directory, name))
+               for name in (EVENTS_FILE, TACTICS_FILE, FREEZE_FRAMES_FILE))
+
+
+def _atomic_write(path, write):
+    # Cada escritor usa um arquivo temporário próprio, então threads e processos
+    # gravando a mesma partida não disputam o mesmo .tmp
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _write_parquet(frame: pd.DataFrame, path, index=False):
+    table = pa.Table.from_pandas(frame, preserve_index=index)
+    _atomic_write(path, lambda tmp_path: pq.write_table(table, tmp_path, compression='zstd'))
+
+
+def _ingest_lock(season, match_id) -> threading.Lock:
+    with _ingest_locks_lock:
+        return _ingest_locks.setdefault((str(season), int(match_id)), threading.Lock())
+
+
+def ingest_match(match_id, season) -> bool:
+    '''
+    Grava a partida no armazém caso ela ainda não tenha sido ingerida. Threads
+    que pedem a mesma partida ao mesmo tempo esperam uma única ingestão.
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        ingested (bool): Se a partida foi gravada nesta chamada
+    '''
+    if is_ingested(season, match_id):
+        return False
+    with _ingest_lock(season, match_id):
+        if is_ingested(season, match_id):
+            return False
+        write_match(fetch_match(match_id), season, match_id)
+    return True
+
+
+def write_match(match: MatchEvents, season, match_id) -> str:
+    '''
+    Grava as tabelas de uma partida e suas estatísticas por jogador no armazém
+
+    Args:
+        match (MatchEvents): Eventos, escalações táticas e freeze frames normalizados
+        season (str): Temporada da partida
+        match_id (int): ID da partida
+
+    Returns:
+        path (str): Caminho do arquivo Parquet de eventos
+    '''
+    directory = match_dir(season, match_id)
+    os.makedirs(directory, exist_ok=True)
+
+    _write_parquet(match.tactics, os.path.join(directory, TACTICS_FILE))
+    _write_parquet(match.freeze_frames, os.path.join(directory, FREEZE_FRAMES_FILE))
+    write_match_stats(player_match_stats(match.events), season, match_id)
+
+    # Os eventos são gravados por último: a partida só conta como ingerida com todos os arquivos
+    # match_id já está no caminho da partição
+    path = os.path.join(directory, EVENTS_FILE)
+    _write_parquet(match.events.drop(columns=['match_id'], errors='ignore'), path)
+    return path
+
+
+def write_match_stats(stats: pd.DataFrame, season, match_id) -> str:
+    '''
+    Grava as estatísticas por jogador de uma partida no armazém
+
+    Args:
+        stats (pd.DataFrame): Estatísticas da partida
+        season (str): Temporada da partida
+        match_id (int): ID da partida
+
+    Returns:
+        path (str): Caminho do arquivo Parquet gravado
+    '''
+    path = os.path.join(match_dir(season, match_id), STATS_FILE)
+    _atomic_write(path, lambda tmp_path: stats.to_parquet(tmp_path, compression='zstd'))
+    return path
+
+
+def _filters(team=None, player=None, types=None):
+    filters = []
+    if team is not None:
+        filters.append(('team', '=', team))
+    if player is not None:
+        filters.append(('player', '=', player))
+    if types is not None:
+        filters.append(('type', 'in', list(types)))
+    return filters or None
+
+
+def _read(path, columns=None, filters=None) -> pd.DataFrame:
+    available = set(pq.read_schema(path).names)
+    if columns is not None:
+        columns = [column for column in columns if column in available]
+    if filters is not None and any(column not in available for column, _, _ in filters):
+        return None
+    return pq.read_table(path, columns=columns, filters=filters,
+                         partitioning=None).to_pandas()
+
+
+@instrumentation.timed
+def load_match(match_id, season) -> MatchEvents:
+    '''
+    Carrega as tabelas de uma partida pelo armazém, lendo e gravando a partida
+    caso ela ainda não tenha sido ingerida
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        match (MatchEvents): Eventos, escalações táticas e freeze frames normalizados
+    '''
+    ingest_match(match_id, season)
+
+    directory = match_dir(season, match_id)
+    events = pq.read_table(os.path.join(directory, EVENTS_FILE), partitioning=None).to_pandas()
+    events.insert(0, 'match_id', int(match_id))
+    tactics = pd.read_parquet(os.path.join(directory, TACTICS_FILE))
+    freeze_frames = pd.read_parquet(os.path.join(directory, FREEZE_FRAMES_FILE))
+
+    return MatchEvents(events, tactics.set_index(['type', 'team']).sort_index(), freeze_frames)
+
+
+def load_match_events(match_id, season) -> pd.DataFrame:
+    '''
+    Carrega os eventos de uma partida pelo armazém
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        events (pd.DataFrame): DataFrame de eventos normalizado
+    '''
+    return load_match(match_id, season).events
+
+
+def load_match_stats(match_id, season) -> pd.DataFrame:
+    '''
+    Carrega as estatísticas por jogador de uma partida, calculando-as a partir
+    dos eventos caso a partida tenha sido ingerida antes da tabela existir
+
+    Args:
+        match_id (int): ID da partida
+        season (str): Temporada da partida
+
+    Returns:
+        stats (pd.DataFrame): Estatísticas indexadas por (team, player)
+    '''
+    path = os.path.join(match_dir(season, match_id), STATS_FILE)
+    if not os.path.exists(path):
+        path = write_match_stats(player_match_stats(load_match_events(match_id, season)),
+                                 season, match_id)
+    return pd.read_parquet(path)
+
+
+def combine_stats(frames) -> pd.DataFrame:
+    '''
+    Soma as estatísticas por jogador de várias partidas
+
+    Args:
+        frames (list): Estatísticas de cada partida, indexadas por (team, player)
+
+    Returns:
+        stats (pd.DataFrame): Estatísticas somadas, com a coluna matches contando
+            as partidas de cada jogador
+    '''
+    if not frames:
+        return pd.DataFrame(columns=METRICS + ['minutes', 'matches'],
+                            index=pd.MultiIndex.from_tuples([], names=['team', 'player']))
+
+    stats = pd.concat(frames).reset_index()
+    stats['matches'] = 1
+    return stats.groupby(['team', 'player'], observed=True).sum()
+
+
+def query_events(season=None, match_ids=None, team=None, player=None, types=None,
+                 columns=None) -> pd.DataFrame:
+    '''
+    Consulta eventos do armazém. Temporada e partidas selecionam as partições
+    lidas; os filtros por time, jogador e tipo são aplicados pelo leitor Parquet.
+
+    Args:
+        season (str): Temporada das partidas
+        match_ids (list): IDs das partidas
+        team (str): Nome do time
+        player (str): Nome do jogador
+        types (list): Tipos de evento, ex.: ['Pass', 'Shot']
+        columns (list): Colunas a serem lidas
+
+    Returns:
+        events (pd.DataFrame): DataFrame com os eventos encontrados
+    '''
+    season_dir = f'season={season}' if season is not None else 'season=*'
+    paths = sorted(glob.glob(os.path.join(EVENTS_DIR, season_dir, 'match_id=*', EVENTS_FILE)))
+    if match_ids is not None:
+        wanted = {f'match_id={int(match_id)}' for match_id in match_ids}
+        paths = [path for path in paths
+                 if os.path.basename(os.path.dirname(path)) in wanted]
+
+    filters = _filters(team, player, types)
+    frames = []
+    for path in paths:
+        frame = _read(path, columns, filters)
+        if frame is None or frame.empty:
+            continue
+        partition = os.path.dirname(path)
+        frame.insert(0, 'match_id', int(partition.rsplit('=', 1)[1]))
+        frame.insert(0, 'season', os.path.basename(os.path.dirname(partition)).split('=', 1)[1])
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    # Categorias diferentes entre partidas viram texto no concat e são recodificadas
+    categorical = {column for frame in frames for column in frame.columns
+                   if isinstance(frame[column].dtype, pd.CategoricalDtype)}
+    events = pd.concat(frames, ignore_index=True)
+    for column in categorical:
+        events[column] = events[column].astype('category')
+    return events
+
+
+def ingest(competition_name=data_source.WORLD_CUP):
+    '''
+    Grava no armazém todas as partidas da competição que ainda não foram ingeridas
+
+    Args:
+        competition_name (str): Nome da competição
+
+    Returns:
+        ingested (int): Número de partidas gravadas
+    '''
+    competitions = sb.competitions()
+    competitions = competitions[competitions['competition_name'] == competition_name]
+    ingested = 0
+
+    for competition_id, season_id in zip(competitions['competition_id'],
+                                         competitions['season_id']):
+        matches = sb.matches(competition_id=competition_id, season_id=season_id)
+        for match_id, season in zip(matches['match_id'], matches['season']):
+            if not ingest_match(match_id, season):
+                continue
+            ingested += 1
+            logger.info('Partida %s (%s) gravada', match_id, season)
+
+    return ingested
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Armazém Parquet de eventos')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = subparsers.add_parser(
+        'ingest', help='Grava no armazém as partidas da competição')
+    ingest_parser.add_argument('--competition', default=data_source.WORLD_CUP)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    data_source.install()
+    ingested = ingest(args.competition)
+    print(f'{ingested} partidas gravadas em {EVENTS_DIR}')
+
+
+if __name__ == '__main__':
+    main()